@@ -0,0 +1,56 @@
+"""
+SQLite embedding cache shared by the ingestion pipeline and the direct test script.
+"""
+import hashlib
+import sqlite3
+from array import array
+from typing import Dict, List
+
+
+class EmbeddingCache:
+    """
+    On-disk cache of embeddings keyed by (model, content hash), stored in SQLite.
+    Vectors are stored as raw float32 bytes.
+    """
+    
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, PRIMARY KEY (model, hash))"
+        )
+        self.conn.commit()
+    
+    @staticmethod
+    def content_hash(text_bytes: bytes) -> str:
+        # Not security-sensitive; BLAKE2b is faster than SHA-256 on 64-bit CPUs
+        return hashlib.blake2b(text_bytes, digest_size=16).hexdigest()
+    
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Return the cached vectors for the given hashes, skipping misses."""
+        found = {}
+        unique_hashes = list(set(hashes))
+        
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(unique_hashes), 500):
+            chunk = unique_hashes[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                [model, *chunk]
+            )
+            for content_hash, vector in rows:
+                found[content_hash] = array('f', vector).tolist()
+        
+        return found
+    
+    def put_many(self, model: str, items: List[tuple]):
+        """Store (hash, vector) pairs."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, hash, vector) VALUES (?, ?, ?)",
+            [(model, content_hash, array('f', vector).tobytes()) for content_hash, vector in items]
+        )
+        self.conn.commit()
+    
+    def close(self):
+        self.conn.close()
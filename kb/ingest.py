@@ -1,19 +1,144 @@
-import json
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 from datetime import datetime
+import functools
 import hashlib
+import itertools
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, fields
 
 # Required libraries - install with:
-# pip install pinecone-client openai python-dotenv
+# pip install pinecone-client openai python-dotenv ijson orjson tiktoken tenacity "httpx[http2]"
 
+import httpx
+import ijson
+import openai
+import orjson
+import tiktoken
+import urllib3
 from pinecone import Pinecone
+from pinecone.exceptions import PineconeApiException
 from openai import OpenAI
 from dotenv import load_dotenv
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+
+from embedding_cache import EmbeddingCache
 
 # Load environment variables
 load_dotenv()
 
+EMBEDDING_MODEL = "text-embedding-3-small"
+# Decimal places kept per embedding value when upserting. Values are ~1e-2 in
+# magnitude, so 5 places keeps ~3-4 significant digits (about float16 precision).
+UPSERT_VALUE_DECIMALS = 5
+# text-embedding-3-small accepts at most 8191 tokens and rejects (not truncates) longer
+# input, which fails the whole batch; stay a little under the limit
+MAX_EMBEDDING_TOKENS = 8100
+# OpenAI also caps the total tokens across all inputs of one embeddings request
+MAX_EMBEDDING_REQUEST_TOKENS = 300_000
+TOKEN_ENCODING_NAME = "cl100k_base"
+# Embedding requests sent concurrently for each group of tickets the pipeline processes
+EMBEDDING_MAX_IN_FLIGHT = 5
+# How long to wait for a newly created index to report ready
+INDEX_READY_TIMEOUT_SECONDS = 300
+# Input files up to this size are parsed in one go with orjson; larger ones are streamed
+STREAMING_THRESHOLD_BYTES = 64 * 1024 * 1024
+EMBEDDING_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'embedding_cache.db')
+# Document IDs upserted by an unfinished run, so a re-run can resume where it stopped
+CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'checkpoint.txt')
+
+@functools.lru_cache(maxsize=1)
+def _token_encoding() -> tiktoken.Encoding:
+    """Load the tokenizer on first use; tiktoken downloads the BPE file the first time."""
+    return tiktoken.get_encoding(TOKEN_ENCODING_NAME)
+
+def _is_transient_error(exc: BaseException) -> bool:
+    """Whether an API error is worth retrying: rate limits, 5xx responses and network failures."""
+    if isinstance(exc, (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)):
+        return True
+    if isinstance(exc, PineconeApiException):
+        # Older SDKs set `status`, newer ones only `status_code`
+        status = getattr(exc, 'status', None) or getattr(exc, 'status_code', None)
+        try:
+            status = int(status or 0)
+        except (TypeError, ValueError):
+            return False
+        return status == 429 or status >= 500
+    return isinstance(exc, (ConnectionError, TimeoutError, urllib3.exceptions.HTTPError))
+
+_wait_exponential = wait_exponential(multiplier=1, max=30)
+
+def _wait_for_retry(retry_state) -> float:
+    """Honor a Retry-After header when the API sends one, else back off exponentially."""
+    exc = retry_state.outcome.exception()
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None) or getattr(exc, 'headers', None) or {}
+    try:
+        return min(float(headers.get('retry-after')), 30)
+    except (TypeError, ValueError):
+        return _wait_exponential(retry_state)
+
+retry_transient = retry(
+    retry=retry_if_exception(_is_transient_error),
+    wait=_wait_for_retry,
+    stop=stop_after_attempt(5),
+    reraise=True
+)
+
+@dataclass(slots=True)
+class TicketMetadata:
+    """
+    Metadata stored alongside a ticket's vector in Pinecone.
+    Kept as a slotted dataclass and only turned into a dict for the upsert payload.
+    """
+    # Ticket identifiers
+    ticket_id: str
+    subject: str
+    
+    # Categorical information
+    category: str
+    priority: str
+    status: str
+    assigned_to: str
+    
+    # Requester information
+    requester_name: str
+    requester_email: str
+    
+    # Dates
+    date_reported: str
+    ingestion_date: str
+    ingestion_time: str
+    
+    # Resolution status
+    is_resolved: bool
+    has_resolution: bool
+    has_next_steps: bool
+    
+    # Text length for potential filtering
+    description_length: int
+    update_count: int
+    
+    # Source information
+    source: str
+    location: str
+    
+    # Resolution text if available (truncated for metadata)
+    resolution_summary: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a Pinecone metadata dict, leaving out unset optional fields."""
+        metadata = {name: getattr(self, name) for name in _TICKET_METADATA_FIELDS}
+        if self.resolution_summary is None:
+            del metadata['resolution_summary']
+        return metadata
+
+_TICKET_METADATA_FIELDS = tuple(f.name for f in fields(TicketMetadata))
+
 class ITServiceDeskKBIngestion:
     def __init__(self):
         """Initialize the ingestion pipeline with API clients."""
@@ -21,8 +146,25 @@ class ITServiceDeskKBIngestion:
         self.pc = Pinecone(api_key=os.getenv('PINECONE_API_KEY'))
         self.index_name = os.getenv('PINECONE_INDEX_NAME')
         
-        # Initialize OpenAI
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        # Initialize OpenAI (retries are handled by retry_transient). One persistent
+        # HTTP/2 client multiplexes the concurrent embedding batches over a single
+        # TLS session instead of handshaking per connection.
+        self.http_client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=20)
+        )
+        self.openai_client = OpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            http_client=self.http_client,
+            max_retries=0
+        )
+        
+        # Embeddings from previous runs, so unchanged tickets are not re-embedded
+        self.embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH)
+        
+        # Document IDs already upserted by an interrupted previous run
+        self.checkpoint_path = CHECKPOINT_PATH
+        self.completed_ids = set()
         
         # Create or connect to index
         self.index = self._get_or_create_index()
@@ -69,9 +211,14 @@ class ITServiceDeskKBIngestion:
             print(f"   Metric: cosine")
             print(f"   Spec: Serverless (AWS us-east-1)")
             
-            # Wait a moment for index to be ready
-            import time
-            time.sleep(5)
+            # Wait until the index reports ready instead of sleeping a fixed time
+            deadline = time.monotonic() + INDEX_READY_TIMEOUT_SECONDS
+            while not self.pc.describe_index(self.index_name).status.ready:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(
+                        f"Index '{self.index_name}' was not ready after {INDEX_READY_TIMEOUT_SECONDS}s"
+                    )
+                time.sleep(0.5)
             
             return self.pc.Index(self.index_name)
             
@@ -87,215 +234,450 @@ class ITServiceDeskKBIngestion:
         """
         Create a comprehensive text representation of a ticket for embedding.
         """
-        # Build the text content
-        text_parts = []
-        
-        # Basic ticket info
-        text_parts.append(f"Ticket ID: {ticket['ticketId']}")
-        text_parts.append(f"Subject: {ticket['subject']}")
-        text_parts.append(f"Category: {ticket['category']}")
-        text_parts.append(f"Priority: {ticket['priority']}")
-        text_parts.append(f"Status: {ticket['status']}")
-        text_parts.append(f"Assigned to: {ticket['assignedTo']}")
-        text_parts.append(f"Requester: {ticket['requester']['name']} ({ticket['requester']['email']})")
-        text_parts.append(f"Date Reported: {ticket['dateReported']}")
-        
-        # User description
-        text_parts.append(f"User Description: {ticket['userDescription']}")
-        
-        # Update history
-        if ticket.get('updateHistory'):
-            text_parts.append("Update History:")
-            for update in ticket['updateHistory']:
-                text_parts.append(f"- {update}")
-        
-        # Resolution (if available)
-        if ticket.get('resolution'):
-            text_parts.append(f"Resolution: {ticket['resolution']}")
-        
-        # Next steps (if available)
-        if ticket.get('nextSteps'):
-            text_parts.append(f"Next Steps: {ticket['nextSteps']}")
-        
-        return "\n".join(text_parts)
+        requester = ticket['requester']
+        update_history = ticket.get('updateHistory')
+        resolution = ticket.get('resolution')
+        next_steps = ticket.get('nextSteps')
+        
+        # Optional sections, each with its leading newline
+        history_text = (
+            "\nUpdate History:\n" + "\n".join([f"- {update}" for update in update_history])
+            if update_history else ""
+        )
+        resolution_text = f"\nResolution: {resolution}" if resolution else ""
+        next_steps_text = f"\nNext Steps: {next_steps}" if next_steps else ""
+        
+        text = (
+            f"Ticket ID: {ticket['ticketId']}\n"
+            f"Subject: {ticket['subject']}\n"
+            f"Category: {ticket['category']}\n"
+            f"Priority: {ticket['priority']}\n"
+            f"Status: {ticket['status']}\n"
+            f"Assigned to: {ticket['assignedTo']}\n"
+            f"Requester: {requester['name']} ({requester['email']})\n"
+            f"Date Reported: {ticket['dateReported']}\n"
+            f"User Description: {ticket['userDescription']}"
+            f"{history_text}{resolution_text}{next_steps_text}"
+        )
+        
+        # Truncate overly long tickets so they can still be embedded. A byte-level BPE
+        # never produces more tokens than bytes, so short texts skip tokenizing.
+        if len(text.encode()) > MAX_EMBEDDING_TOKENS:
+            encoding = _token_encoding()
+            tokens = encoding.encode(text)
+            if len(tokens) > MAX_EMBEDDING_TOKENS:
+                text = encoding.decode(tokens[:MAX_EMBEDDING_TOKENS])
+        
+        return text
+    
+    @retry_transient
+    def _create_embeddings(self, texts: List[str]):
+        """
+        Call the OpenAI embeddings endpoint, retrying transient failures with backoff.
+        """
+        return self.openai_client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=texts,
+            encoding_format="float"
+        )
+    
+    @retry_transient
+    def _upsert_batch(self, batch: List[Dict[str, Any]]):
+        """
+        Upsert one batch of vectors, retrying transient failures with backoff.
+        """
+        return self.index.upsert(vectors=batch)
     
     def generate_embedding(self, text: str) -> List[float]:
         """
         Generate embedding using OpenAI's text-embedding-3-small model.
         """
         try:
-            response = self.openai_client.embeddings.create(
-                model="text-embedding-3-small",
-                input=text,
-                encoding_format="float"
-            )
+            response = self._create_embeddings([text])
             return response.data[0].embedding
         except Exception as e:
             print(f"❌ Error generating embedding: {e}")
             raise
     
-    def create_metadata(self, ticket: Dict[str, Any], dashboard_info: Dict[str, Any]) -> Dict[str, Any]:
+    def _embed_batch(self, batch: List[str], batch_number: int) -> List[Optional[List[float]]]:
         """
-        Create metadata for the ticket chunk.
+        Embed one batch of texts, falling back to one request per text on failure.
         """
-        metadata = {
-            # Ticket identifiers
-            'ticket_id': ticket['ticketId'],
-            'subject': ticket['subject'],
-            
-            # Categorical information
-            'category': ticket['category'],
-            'priority': ticket['priority'],
-            'status': ticket['status'],
-            'assigned_to': ticket['assignedTo'],
-            
-            # Requester information
-            'requester_name': ticket['requester']['name'],
-            'requester_email': ticket['requester']['email'],
-            
-            # Dates
-            'date_reported': ticket['dateReported'],
-            'ingestion_date': dashboard_info['date'],
-            'ingestion_time': dashboard_info['time'],
-            
-            # Resolution status
-            'is_resolved': ticket['status'] == 'Resolved',
-            'has_resolution': 'resolution' in ticket and ticket['resolution'] is not None,
-            'has_next_steps': 'nextSteps' in ticket and ticket['nextSteps'] is not None,
+        # Small random delay so concurrent batches don't hit the API in lockstep
+        time.sleep(random.uniform(0, 0.05))
+        
+        try:
+            response = self._create_embeddings(batch)
+            # Sort by index so embeddings line up with the input texts
+            return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
             
-            # Text length for potential filtering
-            'description_length': len(ticket['userDescription']),
-            'update_count': len(ticket.get('updateHistory', [])),
+        except Exception as e:
+            print(f"❌ Error embedding batch {batch_number}: {e}")
+            print(f"🔁 Retrying batch {batch_number} one text at a time...")
+            embeddings = []
+            for text in batch:
+                try:
+                    embeddings.append(self.generate_embedding(text))
+                except Exception:
+                    embeddings.append(None)
+            return embeddings
+    
+    @staticmethod
+    def _batch_bounds(texts: List[str], batch_size: int) -> List[tuple]:
+        """
+        Split texts into (start, end) batches of at most `batch_size` texts and at most
+        MAX_EMBEDDING_REQUEST_TOKENS tokens. Byte length (capped at MAX_EMBEDDING_TOKENS,
+        which texts are truncated to) is used as an upper bound on each text's tokens.
+        """
+        bounds = []
+        start = 0
+        budget = 0
+        for i, text in enumerate(texts):
+            tokens = min(len(text.encode()), MAX_EMBEDDING_TOKENS)
+            if i > start and (i - start == batch_size or budget + tokens > MAX_EMBEDDING_REQUEST_TOKENS):
+                bounds.append((start, i))
+                start = i
+                budget = 0
+            budget += tokens
+        if start < len(texts):
+            bounds.append((start, len(texts)))
+        return bounds
+    
+    def _embed_concurrently(self, texts: List[str], batch_size: int,
+                            max_in_flight: int) -> List[Optional[List[float]]]:
+        """
+        Embed texts in batches, sending up to `max_in_flight` batches concurrently.
+        """
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            futures = {
+                executor.submit(self._embed_batch, texts[start:end], batch_number): start
+                for batch_number, (start, end) in enumerate(self._batch_bounds(texts, batch_size), 1)
+            }
+            for future in as_completed(futures):
+                start = futures[future]
+                embeddings = future.result()
+                results[start:start + len(embeddings)] = embeddings
+        
+        return results
+    
+    def generate_embeddings_batch(self, texts: List[str], batch_size: int = 256,
+                                  max_in_flight: int = EMBEDDING_MAX_IN_FLIGHT,
+                                  hashes: Optional[List[str]] = None) -> List[Optional[List[float]]]:
+        """
+        Generate embeddings for many texts using batched OpenAI requests.
+        
+        Texts already in the embedding cache are not sent to the API, and duplicate
+        texts are only sent once. Returns one
+        embedding per input text, in input order; texts that could not be embedded get None.
+        
+        `hashes` may pass in precomputed EmbeddingCache.content_hash values for the texts.
+        """
+        if hashes is None:
+            hashes = [EmbeddingCache.content_hash(text.encode()) for text in texts]
+        cached = self.embedding_cache.get_many(EMBEDDING_MODEL, hashes)
+        
+        results: List[Optional[List[float]]] = [cached.get(h) for h in hashes]
+        
+        # Identical texts are embedded once and the vector shared between them
+        uncached_positions: Dict[str, List[int]] = {}
+        for i, vector in enumerate(results):
+            if vector is None:
+                uncached_positions.setdefault(hashes[i], []).append(i)
+        
+        if cached:
+            print(f"💾 Reusing {sum(h in cached for h in hashes)} cached embeddings")
+        
+        if uncached_positions:
+            unique_hashes = list(uncached_positions)
+            embeddings = self._embed_concurrently(
+                [texts[uncached_positions[h][0]] for h in unique_hashes], batch_size, max_in_flight
+            )
+            for content_hash, embedding in zip(unique_hashes, embeddings):
+                for i in uncached_positions[content_hash]:
+                    results[i] = embedding
             
-            # Source information
-            'source': 'IT_Service_Desk_Dashboard',
-            'location': dashboard_info['location']
-        }
+            self.embedding_cache.put_many(EMBEDDING_MODEL, [
+                (content_hash, embedding)
+                for content_hash, embedding in zip(unique_hashes, embeddings)
+                if embedding is not None
+            ])
         
-        # Add resolution text if available (truncated for metadata)
-        if ticket.get('resolution'):
-            metadata['resolution_summary'] = ticket['resolution'][:200]
+        return results
+    
+    def compact_embedding(self, embedding: List[float]) -> List[float]:
+        """
+        Round embedding values for upsert.
         
-        return metadata
+        The upsert request is JSON, where a full-precision float takes ~20 characters;
+        rounding roughly halves the payload with negligible effect on similarity scores.
+        """
+        return [round(value, UPSERT_VALUE_DECIMALS) for value in embedding]
     
-    def create_document_id(self, ticket: Dict[str, Any]) -> str:
+    def create_metadata(self, ticket: Dict[str, Any], ingest_date: str, ingest_time: str,
+                        location: str) -> TicketMetadata:
         """
-        Create a unique document ID for the ticket.
+        Create metadata for the ticket chunk. The ingestion date, time and location
+        come from the dashboard info and are the same for every ticket in a run.
+        """
+        requester = ticket['requester']
+        status = ticket['status']
+        resolution = ticket.get('resolution')
+        
+        return TicketMetadata(
+            ticket['ticketId'],
+            ticket['subject'],
+            ticket['category'],
+            ticket['priority'],
+            status,
+            ticket['assignedTo'],
+            requester['name'],
+            requester['email'],
+            ticket['dateReported'],
+            ingest_date,
+            ingest_time,
+            status == 'Resolved',
+            resolution is not None,
+            ticket.get('nextSteps') is not None,
+            len(ticket['userDescription']),
+            len(ticket.get('updateHistory', [])),
+            'IT_Service_Desk_Dashboard',
+            location,
+            resolution[:200] if resolution else None,
+        )
+    
+    def create_document_id(self, ticket: Dict[str, Any], text_bytes: bytes) -> str:
+        """
+        Create a unique document ID for the ticket from its encoded text content.
         """
         # Use ticket ID as base, add hash of content for uniqueness
-        content = self.create_ticket_text_content(ticket)
-        content_hash = hashlib.md5(content.encode()).hexdigest()[:8]
+        # MD5 is kept so IDs match vectors already in the index; it is only a uniqueness suffix
+        content_hash = hashlib.md5(text_bytes, usedforsecurity=False).hexdigest()[:8]
         return f"{ticket['ticketId']}_{content_hash}"
     
-    def process_tickets(self, json_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def process_tickets(self, tickets: List[Dict[str, Any]], dashboard_info: Dict[str, Any],
+                        embedding_batch_size: int = 256) -> List[Dict[str, Any]]:
         """
-        Process all tickets and prepare them for ingestion.
+        Process a batch of tickets and prepare them for ingestion, embedding them
+        `embedding_batch_size` texts per request.
         """
-        dashboard_info = json_data['dashboardInfo']
-        tickets = json_data['tickets']
-        
         processed_chunks = []
+        texts = []
+        metadatas = []
+        ids = []
+        hashes = []
+        skipped = 0
         
         print(f"📊 Processing {len(tickets)} tickets...")
         
-        for i, ticket in enumerate(tickets, 1):
+        ingest_date, ingest_time, location = dashboard_info['date'], dashboard_info['time'], dashboard_info['location']
+        
+        # First pass: build text content, metadata and IDs for every ticket
+        for ticket in tickets:
             try:
-                # Create text content
                 text_content = self.create_ticket_text_content(ticket)
-                
-                # Generate embedding
-                embedding = self.generate_embedding(text_content)
-                
-                # Create metadata
-                metadata = self.create_metadata(ticket, dashboard_info)
-                
-                # Create document ID
-                doc_id = self.create_document_id(ticket)
-                
-                chunk = {
-                    'id': doc_id,
-                    'values': embedding,
-                    'metadata': metadata
-                }
-                
-                processed_chunks.append(chunk)
-                print(f"✅ Processed ticket {i}/{len(tickets)}: {ticket['ticketId']}")
-                
+                # Encode once; both the document ID and the cache key hash these bytes
+                text_bytes = text_content.encode()
+                metadata = self.create_metadata(ticket, ingest_date, ingest_time, location)
+                doc_id = self.create_document_id(ticket, text_bytes)
             except Exception as e:
-                print(f"❌ Error processing ticket {ticket['ticketId']}: {e}")
+                print(f"❌ Error processing ticket {ticket.get('ticketId')}: {e}")
                 continue
+            
+            if doc_id in self.completed_ids:
+                skipped += 1
+                continue
+            
+            texts.append(text_content)
+            metadatas.append(metadata)
+            ids.append(doc_id)
+            hashes.append(EmbeddingCache.content_hash(text_bytes))
+        
+        # Second pass: generate all embeddings in batched requests
+        embeddings = self.generate_embeddings_batch(texts, batch_size=embedding_batch_size, hashes=hashes)
         
-        print(f"🎯 Successfully processed {len(processed_chunks)} tickets")
+        for doc_id, embedding, metadata in zip(ids, embeddings, metadatas):
+            if embedding is None:
+                print(f"❌ Error processing ticket {metadata.ticket_id}: embedding failed")
+                continue
+            
+            chunk = {
+                'id': doc_id,
+                'values': self.compact_embedding(embedding),
+                'metadata': metadata.to_dict()
+            }
+            
+            processed_chunks.append(chunk)
+        
+        # One progress line per batch; printing per ticket costs a write per ticket
+        if skipped:
+            print(f"⏩ Skipped {skipped} tickets already upserted by a previous run")
+        print(f"🎯 Successfully processed {len(processed_chunks)}/{len(tickets) - skipped} tickets")
         return processed_chunks
     
-    def upsert_to_pinecone(self, chunks: List[Dict[str, Any]], batch_size: int = 100):
+    def upsert_to_pinecone(self, chunks: List[Dict[str, Any]], batch_size: int = 100,
+                           max_in_flight: int = 8, checkpoint_file=None):
         """
-        Upsert processed chunks to Pinecone in batches.
+        Upsert processed chunks to Pinecone in batches, with up to
+        `max_in_flight` batch requests running concurrently.
+        
+        If `checkpoint_file` is given, the IDs of each successfully upserted batch
+        are appended to it.
         """
         print(f"🚀 Starting upsert to Pinecone index '{self.index_name}'...")
         
         total_chunks = len(chunks)
         successful_upserts = 0
         
-        # Process in batches
-        for i in range(0, total_chunks, batch_size):
-            batch = chunks[i:i + batch_size]
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            futures = {
+                executor.submit(self._upsert_batch, chunks[i:i + batch_size]): i
+                for i in range(0, total_chunks, batch_size)
+            }
             
-            try:
-                # Upsert batch
-                upsert_response = self.index.upsert(vectors=batch)
-                successful_upserts += len(batch)
+            for future in as_completed(futures):
+                i = futures[future]
+                batch_number = i // batch_size + 1
+                batch_len = min(batch_size, total_chunks - i)
                 
-                print(f"✅ Upserted batch {i//batch_size + 1}: {len(batch)} vectors")
-                print(f"   Response: {upsert_response}")
-                
-            except Exception as e:
-                print(f"❌ Error upserting batch {i//batch_size + 1}: {e}")
-                continue
+                try:
+                    upsert_response = future.result()
+                    successful_upserts += batch_len
+                    
+                    if checkpoint_file:
+                        checkpoint_file.write("".join(f"{chunk['id']}\n" for chunk in chunks[i:i + batch_len]))
+                        checkpoint_file.flush()
+                    
+                    print(f"✅ Upserted batch {batch_number}: {batch_len} vectors")
+                    print(f"   Response: {upsert_response}")
+                    
+                except Exception as e:
+                    print(f"❌ Error upserting batch {batch_number}: {e}")
+                    continue
         
-        print(f"🎉 Ingestion complete! Successfully upserted {successful_upserts}/{total_chunks} chunks")
+        return successful_upserts
+    
+    def _produce_chunks(self, tickets: Iterator[Dict[str, Any]], dashboard_info: Dict[str, Any],
+                        chunk_queue: queue.Queue, errors: List[Exception], batch_size: int):
+        """
+        Embed tickets batch by batch and put the resulting chunks on the queue.
+        A None sentinel is always queued last, even if processing fails.
         
-        # Get index stats
+        Each step takes enough tickets for EMBEDDING_MAX_IN_FLIGHT embedding requests
+        of `batch_size` texts, so those requests run concurrently.
+        """
         try:
-            stats = self.index.describe_index_stats()
-            print(f"📈 Index stats: {stats}")
+            step = batch_size * EMBEDDING_MAX_IN_FLIGHT
+            while batch := list(itertools.islice(tickets, step)):
+                chunk_queue.put(self.process_tickets(batch, dashboard_info, batch_size))
         except Exception as e:
-            print(f"⚠️ Could not retrieve index stats: {e}")
+            errors.append(e)
+        finally:
+            chunk_queue.put(None)
+    
+    def _open_tickets(self, json_file_path: str):
+        """
+        Open the ticket dump and return (dashboard_info, ticket iterator, open file or None).
+        
+        Files up to STREAMING_THRESHOLD_BYTES are parsed at once with orjson, which is
+        much faster than incremental parsing. Larger files are streamed with ijson so
+        tickets are parsed lazily as the pipeline consumes them; the caller closes the
+        returned file when done.
+        """
+        if os.path.getsize(json_file_path) <= STREAMING_THRESHOLD_BYTES:
+            with open(json_file_path, 'rb') as f:
+                json_data = orjson.loads(f.read())
+            return json_data['dashboardInfo'], iter(json_data['tickets']), None
+        
+        with open(json_file_path, 'rb') as f:
+            dashboard_info = next(ijson.items(f, 'dashboardInfo', use_float=True))
+        json_file = open(json_file_path, 'rb')
+        return dashboard_info, ijson.items(json_file, 'tickets.item', use_float=True), json_file
     
-    def run_ingestion(self, json_file_path: str):
+    def run_ingestion(self, json_file_path: str, batch_size: int = 256):
         """
-        Run the complete ingestion pipeline.
+        Run the complete ingestion pipeline, embedding `batch_size` tickets per request.
         """
         print("🏗️ Starting IT Service Desk KB Ingestion Pipeline")
         print("=" * 60)
         
         # Load JSON data
         try:
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                json_data = json.load(f)
+            dashboard_info, tickets, json_file = self._open_tickets(json_file_path)
             print(f"✅ Loaded JSON data from: {json_file_path}")
         except Exception as e:
             print(f"❌ Error loading JSON file: {e}")
             return
         
-        # Process tickets
-        try:
-            chunks = self.process_tickets(json_data)
-            if not chunks:
-                print("❌ No chunks were processed successfully")
-                return
-        except Exception as e:
-            print(f"❌ Error processing tickets: {e}")
+        # Resume an interrupted run by skipping documents it already upserted
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                self.completed_ids = set(f.read().split())
+            print(f"⏩ Resuming from checkpoint: {len(self.completed_ids)} documents already upserted")
+        checkpoint_file = open(self.checkpoint_path, 'a', encoding='utf-8')
+        
+        # Embed and upsert as a pipeline: while one batch of chunks is being
+        # upserted to Pinecone, the next batch is being embedded by OpenAI
+        chunk_queue = queue.Queue(maxsize=2)
+        producer_errors: List[Exception] = []
+        producer = threading.Thread(
+            target=self._produce_chunks,
+            args=(tickets, dashboard_info, chunk_queue, producer_errors, batch_size),
+            daemon=True
+        )
+        producer.start()
+        
+        total_chunks = 0
+        successful_upserts = 0
+        upsert_error = None
+        
+        while (chunks := chunk_queue.get()) is not None:
+            if upsert_error or not chunks:
+                continue  # Keep draining so the producer never blocks
+            
+            total_chunks += len(chunks)
+            try:
+                successful_upserts += self.upsert_to_pinecone(chunks, checkpoint_file=checkpoint_file)
+            except Exception as e:
+                upsert_error = e
+        
+        producer.join()
+        checkpoint_file.close()
+        if json_file:
+            json_file.close()
+        
+        if producer_errors:
+            print(f"❌ Error processing tickets: {producer_errors[0]}")
+            return
+        
+        if upsert_error:
+            print(f"❌ Error during upsert: {upsert_error}")
             return
         
-        # Upsert to Pinecone
+        if not total_chunks and not self.completed_ids:
+            print("❌ No chunks were processed successfully")
+            return
+        
+        print(f"🎉 Ingestion complete! Successfully upserted {successful_upserts}/{total_chunks} chunks")
+        
+        # The checkpoint is only needed to resume an incomplete run
+        if successful_upserts == total_chunks:
+            os.remove(self.checkpoint_path)
+        
+        # Get index stats
         try:
-            self.upsert_to_pinecone(chunks)
+            stats = self.index.describe_index_stats()
+            print(f"📈 Index stats: {stats}")
         except Exception as e:
-            print(f"❌ Error during upsert: {e}")
-            return
+            print(f"⚠️ Could not retrieve index stats: {e}")
         
         print("🎊 Pipeline completed successfully!")
+    
+    def close(self):
+        """Close the embedding cache database and the OpenAI HTTP client."""
+        self.embedding_cache.close()
+        self.http_client.close()
 
 def main():
     """
@@ -317,7 +699,10 @@ def main():
     
     # Run with the JSON file (update path as needed)
     json_file_path = "/home/ronak/Ronak/Q2-25/mcp-server/kb/1.json"  # Update this to your file path
-    ingestion.run_ingestion(json_file_path)
+    try:
+        ingestion.run_ingestion(json_file_path)
+    finally:
+        ingestion.close()
 
 if __name__ == "__main__":
     main()
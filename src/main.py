@@ -1,21 +1,28 @@
 #!/usr/bin/env python3
 """
-FastMCP Server with Tavily Web Search Integration using Official SDK (Synchronous)
+FastMCP Server with Tavily Web Search Integration using Official SDK
 
 This MCP server provides web search capabilities using Tavily's official Python SDK.
 It exposes search tools that can be used by MCP clients to perform web searches.
 """
 import asyncio
+import functools
 import os
-from typing import Any, Dict, List, Optional
-from tavily import TavilyClient
+import re
+import sys
+import time
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence
+)
 from fastmcp import FastMCP
-from openai import OpenAI
-from pinecone import Pinecone
-import requests
-import json
+import httpx
+import orjson
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    import numpy as np
+
 load_dotenv()
 
 # Initialize FastMCP server
@@ -33,30 +40,22 @@ EMBEDDING_MODEL = "text-embedding-3-small"
 # Request API configuration
 REQUEST_SERVER_URL = os.getenv("REQUEST_SERVER_URL")
 REQUEST_ACCESS_TOKEN = os.getenv("REQUEST_ACCESS_TOKEN")
-
-# Initialize clients
-tavily_client = None
-openai_client = None
-pinecone_index = None
-
-if TAVILY_API_KEY:
-    tavily_client = TavilyClient(api_key=TAVILY_API_KEY)
-else:
+# Coalesce concurrent create_request calls into bulk POSTs (off by default)
+REQUEST_BATCH_ENABLED = os.getenv("REQUEST_BATCH_ENABLED", "").lower() in ("1", "true", "yes")
+REQUEST_BATCH_SIZE = 16
+REQUEST_FLUSH_INTERVAL_MS = 50
+# Directory create_request may upload attachment files from (uploads disabled when unset)
+REQUEST_UPLOAD_DIR = os.getenv("REQUEST_UPLOAD_DIR")
+
+# SDK clients are imported and created on first use (see the helpers below),
+# so a server that only uses some tools never loads the other SDKs
+if not TAVILY_API_KEY:
     print("Warning: TAVILY_API_KEY environment variable not set")
 
-if OPENAI_API_KEY:
-    openai_client = OpenAI(api_key=OPENAI_API_KEY)
-else:
+if not OPENAI_API_KEY:
     print("Warning: OPENAI_API_KEY environment variable not set")
 
-if PINECONE_API_KEY and PINECONE_INDEX_NAME:
-    try:
-        pc = Pinecone(api_key=PINECONE_API_KEY)
-        pinecone_index = pc.Index(PINECONE_INDEX_NAME)
-        print(f"✅ Connected to Pinecone index: {PINECONE_INDEX_NAME}")
-    except Exception as e:
-        print(f"Warning: Could not connect to Pinecone: {e}")
-else:
+if not PINECONE_API_KEY or not PINECONE_INDEX_NAME:
     print(
         "Warning: PINECONE_API_KEY or PINECONE_INDEX_NAME environment variable not set"
     )
@@ -67,8 +66,435 @@ if not REQUEST_SERVER_URL or not REQUEST_ACCESS_TOKEN:
     )
 
 
+@functools.lru_cache(maxsize=1)
+def _tavily():
+    """Return the Tavily client, or None if TAVILY_API_KEY is not set."""
+    if not TAVILY_API_KEY:
+        return None
+    from tavily import TavilyClient
+
+    return TavilyClient(api_key=TAVILY_API_KEY)
+
+
+@functools.lru_cache(maxsize=1)
+def _openai():
+    """Return the async OpenAI client, or None if OPENAI_API_KEY is not set."""
+    if not OPENAI_API_KEY:
+        return None
+    from openai import AsyncOpenAI
+
+    # Pooled HTTP/2 connection shared by concurrent kb_search calls
+    return AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        http_client=httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        ),
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _get_pinecone_index():
+    """Connect to the Pinecone index on first use and reuse the connection."""
+    try:
+        # gRPC client: protobuf-encoded vectors over a multiplexed HTTP/2 channel
+        from pinecone.grpc import PineconeGRPC
+    except ImportError:
+        from pinecone import Pinecone
+    else:
+        return PineconeGRPC(api_key=PINECONE_API_KEY).Index(PINECONE_INDEX_NAME)
+
+    # The REST client takes a connection pool size; the gRPC one ignores it
+    pc = Pinecone(api_key=PINECONE_API_KEY)
+    return pc.Index(PINECONE_INDEX_NAME, pool_threads=20)
+
+
+@functools.lru_cache(maxsize=1)
+def _pinecone_retry_errors() -> tuple:
+    """Errors after which kb_search reconnects to Pinecone and retries once."""
+    from pinecone.exceptions import PineconeException
+
+    return (ConnectionError, PineconeException)
+
+
+def _query_pinecone(**query_kwargs: Any):
+    """Query the Pinecone index, connecting first if needed (blocking)."""
+    return _get_pinecone_index().query(**query_kwargs)
+
+
+# Request API endpoint and headers are constant for the life of the process
+_REQUEST_URL = (
+    f"{REQUEST_SERVER_URL.rstrip('/')}/api/v1/request" if REQUEST_SERVER_URL else None
+)
+_REQUEST_BULK_URL = f"{_REQUEST_URL}/bulk" if _REQUEST_URL else None
+_REQUEST_HEADERS = (
+    {"Authorization": f"Bearer {REQUEST_ACCESS_TOKEN}"} if REQUEST_ACCESS_TOKEN else None
+)
+# Sent per call rather than on the client so multipart uploads keep their boundary
+_JSON_HEADERS = {"Content-Type": "application/json"}
+_ATTACHMENT_UPLOAD_TIMEOUT = 60
+_UPLOAD_ROOT = os.path.realpath(REQUEST_UPLOAD_DIR) if REQUEST_UPLOAD_DIR else None
+
+# Pooled async HTTP client for the Request API (closed on server shutdown).
+# Connections are kept alive and reused across calls, so only the first request
+# pays for the TCP + TLS handshake; failed connection attempts are retried.
+request_http_client = httpx.AsyncClient(
+    headers=_REQUEST_HEADERS,
+    transport=httpx.AsyncHTTPTransport(
+        retries=2,
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+    ),
+    timeout=30,
+)
+
+# Request API validation: ordered names for error messages, frozensets for lookups
+_IMPACT_NAMES = ("Low", "On User", "On department", "Or On Business")
+_PRIORITY_NAMES = ("Low", "Medium", "High", "Urgent")
+_URGENCY_NAMES = ("Low", "Medium", "High", "Urgent")
+_STATUS_NAMES = ("Open", "In Progress", "Pending", "Resolved", "Closed")
+_VALID_IMPACT = frozenset(_IMPACT_NAMES)
+_VALID_PRIORITY = frozenset(_PRIORITY_NAMES)
+_VALID_URGENCY = frozenset(_URGENCY_NAMES)
+_VALID_STATUS = frozenset(_STATUS_NAMES)
+_VALID_SUPPORT_LEVELS = frozenset({"tier1", "tier2", "tier3", "tier4"})
+_EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+# Tool error responses that never change are built once and returned as-is;
+# templates are filled in for errors that carry a dynamic part
+_ERR_TAVILY = {
+    "error": "Tavily client not initialized. Please set TAVILY_API_KEY environment variable."
+}
+_ERR_PINECONE = {
+    "error": "Pinecone index not initialized. Please check PINECONE_API_KEY and PINECONE_INDEX_NAME environment variables."
+}
+_ERR_OPENAI = {
+    "error": "OpenAI client not initialized. Please set OPENAI_API_KEY environment variable."
+}
+_ERR_REQUEST_API = {
+    "error": "Request API not configured. Please set REQUEST_SERVER_URL and REQUEST_ACCESS_TOKEN environment variables."
+}
+_ERR_SUBJECT_EMPTY = {"error": "Subject is required and cannot be empty."}
+_ERR_REQUESTER_EMPTY = {"error": "Requester email is required and cannot be empty."}
+_ERR_REQUESTER_EMAIL = {"error": "Invalid requester email format."}
+_ERR_ASSIGNEE_EMAIL = {"error": "Invalid assignee email format."}
+_ERR_IMPACT = {"error": f"Invalid impact_name. Must be one of: {', '.join(_IMPACT_NAMES)}"}
+_ERR_PRIORITY = {"error": f"Invalid priority_name. Must be one of: {', '.join(_PRIORITY_NAMES)}"}
+_ERR_URGENCY = {"error": f"Invalid urgency_name. Must be one of: {', '.join(_URGENCY_NAMES)}"}
+_ERR_SUPPORT_LEVEL = {"error": "Invalid support_level. Must be one of: Tier1, Tier2, Tier3, Tier4"}
+_ERR_STATUS = {"error": f"Invalid status_name. Must be one of: {', '.join(_STATUS_NAMES)}"}
+_ERR_TIMEOUT = {
+    "error": "Request timeout: The API request took too long to complete. Please try again."
+}
+_ERR_CONNECT = {
+    "error": f"Connection error: Could not connect to {REQUEST_SERVER_URL}. Please check the server URL."
+}
+_BULK_MISMATCH_ERROR = (
+    "Bulk response did not contain one result per request; "
+    "whether this request was created is unknown."
+)
+_CC_EMAIL_ERROR = "Invalid CC email format: {}"
+_SEARCH_ERROR = "Search error: {}"
+_KB_SEARCH_ERROR = "Knowledge base search error: {}"
+_REQUEST_ERROR = "Request error: {}"
+_UNEXPECTED_REQUEST_ERROR = "Unexpected error while creating request: {}"
+
+# Request API statuses whose error response does not depend on the response body
+_STATIC_ERRORS = {
+    401: {"error": "Unauthorized: Invalid or expired access token. Please check REQUEST_ACCESS_TOKEN."},
+    403: {"error": "Forbidden: You don't have permission to create requests."},
+    404: {"error": "Not Found: The API endpoint was not found. Please check REQUEST_SERVER_URL."},
+    500: {"error": "Internal Server Error: The server encountered an error while processing the request."},
+}
+
+
+def _strip(value: str) -> str:
+    """Trim surrounding whitespace, returning the same string when there is none."""
+    if not value or (not value[0].isspace() and not value[-1].isspace()):
+        return value
+    return value.strip()
+
+
+def _upload_path(real_name: str) -> Optional[str]:
+    """Resolve real_name to a file inside REQUEST_UPLOAD_DIR, or None if it is not one."""
+    if not _UPLOAD_ROOT or not real_name:
+        return None
+    # realpath resolves ".." and symlinks, so the prefix check cannot be escaped
+    path = os.path.realpath(os.path.join(_UPLOAD_ROOT, real_name))
+    if not path.startswith(_UPLOAD_ROOT + os.sep) or not os.path.isfile(path):
+        return None
+    return path
+
+
+def _first_invalid_email(emails: Sequence[str]) -> Optional[str]:
+    """Return the first address in emails that is not a valid email, if any."""
+    return next((e for e in emails if not _EMAIL_RE.fullmatch(e)), None)
+
+
+# Response cache settings
+CACHE_TTL_SECONDS = 300
+SEMANTIC_CACHE_SIZE = 512
+SEMANTIC_CACHE_THRESHOLD = 0.95
+WEB_SEARCH_CACHE_SIZE = 256
+KB_EXACT_CACHE_SIZE = 256
+
+
+class TTLCache:
+    """
+    Small LRU cache with a per-entry time-to-live, keyed by any hashable value.
+    """
+
+    def __init__(self, max_entries: int, ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+@functools.lru_cache(maxsize=1)
+def _numpy():
+    """Import numpy on first use; only the kb_search response cache needs it."""
+    import numpy
+
+    return numpy
+
+
+class SemanticCache:
+    """
+    Bounded cache of tool responses keyed by query embedding.
+
+    A lookup hits when a stored entry with the same parameters has cosine
+    similarity >= threshold with the query embedding and has not expired.
+    Once full, the oldest entry is overwritten.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = SEMANTIC_CACHE_SIZE,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl: float = CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self._vectors: "Optional[np.ndarray]" = None  # unit-normalized rows
+        self._entries: List[Optional[tuple]] = [None] * max_entries
+        self._next = 0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> "Optional[np.ndarray]":
+        np = _numpy()
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def get(self, embedding: Sequence[float], params: Hashable) -> Optional[Dict[str, Any]]:
+        query = self._normalize(embedding)
+        if self._vectors is None or query is None:
+            return None
+
+        np = _numpy()
+        similarities = self._vectors @ query
+        candidates = np.flatnonzero(similarities >= self.threshold)
+        now = time.monotonic()
+        # Best match first
+        for i in candidates[np.argsort(-similarities[candidates])]:
+            entry = self._entries[i]
+            if entry is not None and entry[0] == params and entry[1] >= now:
+                return entry[2]
+        return None
+
+    def put(self, embedding: Sequence[float], params: Hashable, response: Dict[str, Any]) -> None:
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        if self._vectors is None:
+            np = _numpy()
+            self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+        self._vectors[self._next] = vector
+        self._entries[self._next] = (params, time.monotonic() + self.ttl, response)
+        self._next = (self._next + 1) % self.max_entries
+
+
+web_search_cache = TTLCache(WEB_SEARCH_CACHE_SIZE)
+kb_search_cache = SemanticCache()
+# Exact repeats of a kb_search call skip the embedding request as well
+kb_exact_cache = TTLCache(KB_EXACT_CACHE_SIZE)
+
+# Query embedding batching settings
+EMBEDDING_BATCH_SIZE = 32
+EMBEDDING_FLUSH_INTERVAL_MS = 10
+
+
+class AsyncBatcher:
+    """
+    Coalesces concurrent calls into batched calls of an async flusher.
+
+    Items are collected for up to `flush_interval_ms` after the first one
+    arrives (or until `batch_size` are pending) and passed to `flusher` as a
+    list; the flusher returns one result per item, in order, and each caller
+    gets back its own result. A result that is an exception is raised to
+    its caller only; if the flusher itself raises, every caller in the batch
+    receives the exception.
+    """
+
+    def __init__(
+        self,
+        flusher: Callable[[List[Any]], Awaitable[Sequence[Any]]],
+        batch_size: int,
+        flush_interval_ms: float,
+    ):
+        self.flusher = flusher
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: set = set()
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Start the background worker on first use in this event loop
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._spawn(self._run())
+
+        future = loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _drain(self) -> List[tuple]:
+        entries = [await self._queue.get()]
+        if self._queue.qsize() < self.batch_size - 1:
+            await asyncio.sleep(self.flush_interval)
+        while len(entries) < self.batch_size and not self._queue.empty():
+            entries.append(self._queue.get_nowait())
+        return entries
+
+    async def _run(self) -> None:
+        while True:
+            entries = await self._drain()
+            # Flush in the background so the next batch can start collecting
+            self._spawn(self._flush(entries))
+
+    async def _flush(self, entries: List[tuple]) -> None:
+        try:
+            results = await self.flusher([item for item, _ in entries])
+            if len(results) != len(entries):
+                raise RuntimeError(
+                    f"Batch flusher returned {len(results)} results for {len(entries)} items"
+                )
+            for (_, future), result in zip(entries, results):
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in entries:
+                if not future.done():
+                    future.set_exception(e)
+
+
+async def _embed_texts(texts: List[str]) -> List[Any]:
+    """
+    Embed a batch of query texts with a single OpenAI call.
+
+    If OpenAI rejects the batch (e.g. one text is empty), each text is
+    embedded on its own so only the rejected ones fail; their entries in
+    the returned list are the exceptions.
+    """
+    from openai import BadRequestError
+
+    try:
+        response = await _openai().embeddings.create(input=texts, model=EMBEDDING_MODEL)
+    except BadRequestError:
+        if len(texts) == 1:
+            raise
+        return await asyncio.gather(
+            *(_embed_one(text) for text in texts), return_exceptions=True
+        )
+    return [data.embedding for data in sorted(response.data, key=lambda d: d.index)]
+
+
+async def _embed_one(text: str) -> List[float]:
+    """Embed a single query text, outside of any batch."""
+    response = await _openai().embeddings.create(input=[text], model=EMBEDDING_MODEL)
+    return response.data[0].embedding
+
+
+embedding_batcher = AsyncBatcher(
+    _embed_texts, EMBEDDING_BATCH_SIZE, EMBEDDING_FLUSH_INTERVAL_MS
+)
+
+# Maximum concurrent Tavily calls when a search is sharded across domains
+WEB_SEARCH_SHARD_CONCURRENCY = 5
+
+
+async def _sharded_search(include_domains: List[str], **search_kwargs: Any) -> Dict[str, Any]:
+    """
+    Run one Tavily search per domain concurrently and merge the responses.
+
+    Results are deduplicated by URL (keeping the highest score), sorted by
+    score and truncated to max_results, so the merged response has the
+    same shape as a single Tavily search call. Only used for searches
+    without an answer, since one answer cannot be built from separate shards.
+    """
+    semaphore = asyncio.Semaphore(WEB_SEARCH_SHARD_CONCURRENCY)
+
+    async def search_domain(domain: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await asyncio.to_thread(
+                _tavily().search, include_domains=[domain], **search_kwargs
+            )
+
+    responses = await asyncio.gather(
+        *(search_domain(domain) for domain in dict.fromkeys(include_domains))
+    )
+
+    best_by_url: Dict[str, Dict[str, Any]] = {}
+    for response in responses:
+        for result in response.get("results") or ():
+            url = result.get("url", "")
+            current = best_by_url.get(url)
+            if current is None or result.get("score", 0) > current.get("score", 0):
+                best_by_url[url] = result
+    results = sorted(best_by_url.values(), key=lambda r: r.get("score", 0), reverse=True)
+
+    merged = {
+        "answer": "",
+        "results": results[: search_kwargs["max_results"]],
+        "response_time": max(r.get("response_time", 0) for r in responses),
+    }
+    if search_kwargs["include_images"]:
+        merged["images"] = [image for r in responses for image in r.get("images") or ()]
+    return merged
+
+
 @mcp.tool()
-def web_search(
+async def web_search(
     query: str,
     max_results: int = 5,
     search_depth: str = "basic",
@@ -95,45 +521,68 @@ def web_search(
         Dictionary containing search results with answer, results, and metadata
     """
 
+    tavily_client = _tavily()
     if not tavily_client:
-        return {
-            "error": "Tavily client not initialized. Please set TAVILY_API_KEY environment variable."
-        }
+        return _ERR_TAVILY
+
+    # Identical searches within the TTL are served from cache
+    cache_key = (
+        query,
+        max_results,
+        search_depth,
+        include_answer,
+        include_raw_content,
+        tuple(include_domains or ()),
+        tuple(exclude_domains or ()),
+        include_images,
+    )
+    cached_response = web_search_cache.get(cache_key)
+    if cached_response is not None:
+        return cached_response
+
+    search_kwargs = {
+        "query": query,
+        "max_results": max_results,
+        "search_depth": search_depth,
+        "include_answer": include_answer,
+        "include_raw_content": include_raw_content,
+        "exclude_domains": exclude_domains,
+        "include_images": include_images,
+    }
 
     try:
-        # Use the SDK's search method (synchronous)
-        response = tavily_client.search(
-            query=query,
-            max_results=max_results,
-            search_depth=search_depth,
-            include_answer=include_answer,
-            include_raw_content=include_raw_content,
-            include_domains=include_domains,
-            exclude_domains=exclude_domains,
-            include_images=include_images,
-        )
-
-        # Format the response for better readability
-        formatted_response = {
-            "query": query,
-            "answer": response.get("answer", ""),
-            "results": [],
-        }
-
-        # Process search results
-        for result in response.get("results", []):
-            formatted_result = {
+        if include_domains and len(include_domains) > 1 and not include_answer:
+            # Search each domain concurrently instead of one multi-domain call
+            response = await _sharded_search(include_domains, **search_kwargs)
+        else:
+            # The SDK is synchronous; run it in a worker thread so the event loop stays free
+            response = await asyncio.to_thread(
+                tavily_client.search, include_domains=include_domains, **search_kwargs
+            )
+
+        # Format the search results in a single pass
+        results = response.get("results") or ()
+        formatted_results = [
+            {
                 "title": result.get("title", ""),
                 "url": result.get("url", ""),
                 "content": result.get("content", ""),
                 "score": result.get("score", 0),
             }
+            for result in results
+        ]
 
-            # Include raw content if requested and available
-            if include_raw_content and "raw_content" in result:
-                formatted_result["raw_content"] = result["raw_content"]
+        # Include raw content if requested and available
+        if include_raw_content:
+            for formatted_result, result in zip(formatted_results, results):
+                if "raw_content" in result:
+                    formatted_result["raw_content"] = result["raw_content"]
 
-            formatted_response["results"].append(formatted_result)
+        formatted_response = {
+            "query": query,
+            "answer": response.get("answer", ""),
+            "results": formatted_results,
+        }
 
         # Add images if requested and available
         if include_images and "images" in response:
@@ -141,19 +590,20 @@ def web_search(
 
         # Add metadata
         formatted_response["metadata"] = {
-            "total_results": len(formatted_response["results"]),
+            "total_results": len(formatted_results),
             "search_depth": search_depth,
             "response_time": response.get("response_time", 0),
         }
 
+        web_search_cache.put(cache_key, formatted_response)
         return formatted_response
 
     except Exception as e:
-        return {"error": f"Search error: {str(e)}"}
+        return {"error": _SEARCH_ERROR.format(e)}
 
 
 @mcp.tool()
-def kb_search(
+async def kb_search(
     query: str, top_k: int = 5, include_metadata: bool = True
 ) -> Dict[str, Any]:
     """
@@ -162,66 +612,212 @@ def kb_search(
     Args:
         query: The search query string
         top_k: Number of top similar chunks to return (default: 5)
-        include_metadata: Whether to include metadata in results (default: True)
+        include_metadata: Whether to include text, source and metadata in results;
+            when False only ids and scores are returned (default: True)
 
     Returns:
         Dictionary containing search results with similarity scores and metadata
     """
 
-    if not pinecone_index:
-        return {
-            "error": "Pinecone index not initialized. Please check PINECONE_API_KEY and PINECONE_INDEX_NAME environment variables."
-        }
-
-    if not openai_client:
-        return {
-            "error": "OpenAI client not initialized. Please set OPENAI_API_KEY environment variable."
-        }
+    if not PINECONE_API_KEY or not PINECONE_INDEX_NAME:
+        return _ERR_PINECONE
 
-    try:
-        # Generate embedding for the query using OpenAI
-        embedding_response = openai_client.embeddings.create(
-            input=[query], model=EMBEDDING_MODEL
-        )
-        query_embedding = embedding_response.data[0].embedding
+    if not OPENAI_API_KEY:
+        return _ERR_OPENAI
 
-        # Search Pinecone for similar chunks
-        search_response = pinecone_index.query(
-            vector=query_embedding, top_k=top_k, include_metadata=include_metadata
-        )
+    exact_key = (query, top_k, include_metadata)
+    cached_response = kb_exact_cache.get(exact_key)
+    if cached_response is not None:
+        return cached_response
 
-        # Format the response
-        formatted_response = {"query": query, "results": []}
+    try:
+        # Generate embedding for the query using OpenAI (batched with concurrent queries)
+        query_embedding = await embedding_batcher.submit(query)
 
-        for match in search_response.matches:
-            result = {
-                "id": match.id,
-                "score": float(match.score),
-                "text": match.metadata.get("text", "") if match.metadata else "",
-                "source": match.metadata.get("source", "") if match.metadata else "",
-            }
+        # Reuse the response of a recent, near-identical query
+        cache_params = (top_k, include_metadata)
+        cached_response = kb_search_cache.get(query_embedding, cache_params)
+        if cached_response is not None:
+            cached_response = {**cached_response, "query": query}
+            kb_exact_cache.put(exact_key, cached_response)
+            return cached_response
 
-            # Include full metadata if requested
-            if include_metadata and match.metadata:
-                result["metadata"] = match.metadata
+        # Search Pinecone for similar chunks
+        query_kwargs = {
+            "vector": query_embedding,
+            "top_k": top_k,
+            "include_metadata": include_metadata,
+        }
+        try:
+            search_response = await asyncio.to_thread(_query_pinecone, **query_kwargs)
+        except _pinecone_retry_errors():
+            # Drop the cached connection and reconnect once
+            _get_pinecone_index.cache_clear()
+            search_response = await asyncio.to_thread(_query_pinecone, **query_kwargs)
+
+        # Format the matches in a single pass; without metadata only ids and scores are meaningful
+        if include_metadata:
+            results = [
+                {
+                    "id": match.id,
+                    "score": float(match.score),
+                    "text": (match.metadata or {}).get("text", ""),
+                    "source": (match.metadata or {}).get("source", ""),
+                    "metadata": match.metadata or {},
+                }
+                for match in search_response.matches
+            ]
+        else:
+            results = [
+                {"id": match.id, "score": float(match.score)}
+                for match in search_response.matches
+            ]
 
-            formatted_response["results"].append(result)
+        formatted_response = {"query": query, "results": results}
 
         # Add search metadata
         formatted_response["metadata"] = {
-            "total_results": len(formatted_response["results"]),
+            "total_results": len(results),
             "embedding_model": EMBEDDING_MODEL,
             "index_name": PINECONE_INDEX_NAME,
         }
 
+        kb_search_cache.put(query_embedding, cache_params, formatted_response)
+        kb_exact_cache.put(exact_key, formatted_response)
         return formatted_response
 
     except Exception as e:
-        return {"error": f"Knowledge base search error: {str(e)}"}
+        return {"error": _KB_SEARCH_ERROR.format(e)}
+
+
+async def _post_with_attachments(
+    payload: Dict[str, Any], attachments: List[str]
+) -> httpx.Response:
+    """
+    Create a request as multipart/form-data, streaming local files as binary parts.
+
+    The JSON payload is sent in the "data" field and each attachment as a
+    "files" part, which avoids base64-inflating the files into the JSON body.
+
+    Args:
+        payload: Request payload without the local attachments
+        attachments: Resolved paths of files inside REQUEST_UPLOAD_DIR
+
+    Returns:
+        The Request API response
+    """
+    handles = []
+    try:
+        for path in attachments:
+            handles.append(open(path, "rb"))
+        files = [
+            ("files", (os.path.basename(path), handle, "application/octet-stream"))
+            for path, handle in zip(attachments, handles)
+        ]
+        return await request_http_client.post(
+            _REQUEST_URL,
+            data={"data": orjson.dumps(payload).decode()},
+            files=files,
+            timeout=_ATTACHMENT_UPLOAD_TIMEOUT,
+        )
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def _parse_request_response(response: httpx.Response) -> Dict[str, Any]:
+    """Map a Request API response to the create_request result format."""
+    # Handle different response status codes
+    if response.status_code in (200, 201):
+        try:
+            response_data = orjson.loads(response.content)
+            return {
+                "success": True,
+                "message": "Request created successfully",
+                "request_data": response_data,
+            }
+        except orjson.JSONDecodeError:
+            return {
+                "success": True,
+                "message": "Request created successfully",
+                "raw_response": response.text,
+            }
+
+    static_error = _STATIC_ERRORS.get(response.status_code)
+    if static_error:
+        return static_error
+
+    if response.status_code == 400:
+        try:
+            error_data = orjson.loads(response.content)
+            return {
+                "error": f"Bad Request: {error_data.get('message', 'Invalid request data')}",
+                "details": error_data,
+            }
+        except orjson.JSONDecodeError:
+            return {"error": f"Bad Request: {response.text}"}
+
+    try:
+        error_data = orjson.loads(response.content)
+        return {
+            "error": f"API request failed with status {response.status_code}",
+            "details": error_data,
+        }
+    except orjson.JSONDecodeError:
+        return {
+            "error": f"API request failed with status {response.status_code}: {response.text}"
+        }
+
+
+async def _post_bulk(payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Create a batch of requests with a single POST to the bulk endpoint.
+
+    Args:
+        payloads: Request payloads, one per create_request call
+
+    Returns:
+        One create_request result per payload, in order. An error response is
+        returned to every caller; so is an explicit error when a successful
+        response does not contain one created request per payload.
+    """
+    response = await request_http_client.post(
+        _REQUEST_BULK_URL,
+        content=orjson.dumps({"requests": payloads}),
+        headers=_JSON_HEADERS,
+    )
+
+    if response.status_code in (200, 201):
+        try:
+            response_data = orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            response_data = None
+        if isinstance(response_data, dict):
+            response_data = response_data.get("requests")
+        if isinstance(response_data, list) and len(response_data) == len(payloads):
+            return [
+                {
+                    "success": True,
+                    "message": "Request created successfully",
+                    "request_data": request_data,
+                }
+                for request_data in response_data
+            ]
+        # The batch may have been created, but no caller can tell which result is theirs
+        return [
+            {"error": _BULK_MISMATCH_ERROR, "raw_response": response.text}
+            for _ in payloads
+        ]
+
+    result = _parse_request_response(response)
+    return [dict(result) for _ in payloads]
+
+
+request_batcher = AsyncBatcher(_post_bulk, REQUEST_BATCH_SIZE, REQUEST_FLUSH_INTERVAL_MS)
 
 
 @mcp.tool()
-def create_request(
+async def create_request(
     subject: str,
     requester_email: str,
     category_name: str = "Request",
@@ -268,65 +864,62 @@ def create_request(
         custom_field: Custom field key-value pairs
         link_asset_ids: Asset IDs to link - [{"assetModel": "asset_hardware", "assetId": 1}]
         link_ci_ids: CI IDs to link - [{"ciId": 2, "ciModel": "cmdb"}]
-        file_attachments: File attachments - [{"refFileName": "abc", "realName": "xyz.pdf"}]
+        file_attachments: File attachments - [{"refFileName": "abc", "realName": "xyz.pdf"}];
+            when REQUEST_UPLOAD_DIR is set, entries whose realName is a file inside it
+            are uploaded as multipart parts
 
     Returns:
         Dictionary containing the created request details or error information
     """
 
     if not REQUEST_SERVER_URL or not REQUEST_ACCESS_TOKEN:
-        return {
-            "error": "Request API not configured. Please set REQUEST_SERVER_URL and REQUEST_ACCESS_TOKEN environment variables."
-        }
+        return _ERR_REQUEST_API
 
-    # Validate required fields
-    if not subject or not subject.strip():
-        return {"error": "Subject is required and cannot be empty."}
+    # Validate required fields (trimmed once and reused in the payload)
+    subject = _strip(subject or "")
+    if not subject:
+        return _ERR_SUBJECT_EMPTY
 
-    if not requester_email or not requester_email.strip():
-        return {"error": "Requester email is required and cannot be empty."}
+    requester_email = _strip(requester_email or "")
+    if not requester_email:
+        return _ERR_REQUESTER_EMPTY
 
     # Basic email validation
-    if "@" not in requester_email or "." not in requester_email:
-        return {"error": "Invalid requester email format."}
+    if not _EMAIL_RE.fullmatch(requester_email):
+        return _ERR_REQUESTER_EMAIL
 
     # Validate enum values (case-insensitive for support level)
-    valid_impact_names = ["Low", "On User", "On department", "Or On Business"]
-    if impact_name not in valid_impact_names:
-        return {
-            "error": f"Invalid impact_name. Must be one of: {', '.join(valid_impact_names)}"
-        }
+    if impact_name not in _VALID_IMPACT:
+        return _ERR_IMPACT
 
-    valid_priority_names = ["Low", "Medium", "High", "Urgent"]
-    if priority_name not in valid_priority_names:
-        return {
-            "error": f"Invalid priority_name. Must be one of: {', '.join(valid_priority_names)}"
-        }
+    if priority_name not in _VALID_PRIORITY:
+        return _ERR_PRIORITY
 
-    valid_urgency_names = ["Low", "Medium", "High", "Urgent"]
-    if urgency_name not in valid_urgency_names:
-        return {
-            "error": f"Invalid urgency_name. Must be one of: {', '.join(valid_urgency_names)}"
-        }
+    if urgency_name not in _VALID_URGENCY:
+        return _ERR_URGENCY
 
     # Support level validation - convert to lowercase for API
-    valid_support_levels_api = ["tier1", "tier2", "tier3", "tier4"]
     support_level_lower = support_level.lower()
-    if support_level_lower not in valid_support_levels_api:
-        return {
-            "error": "Invalid support_level. Must be one of: Tier1, Tier2, Tier3, Tier4"
-        }
+    if support_level_lower not in _VALID_SUPPORT_LEVELS:
+        return _ERR_SUPPORT_LEVEL
 
-    valid_status_names = ["Open", "In Progress", "Pending", "Resolved", "Closed"]
-    if status_name not in valid_status_names:
-        return {
-            "error": f"Invalid status_name. Must be one of: {', '.join(valid_status_names)}"
-        }
+    if status_name not in _VALID_STATUS:
+        return _ERR_STATUS
+
+    # Validate optional emails
+    invalid_email = _first_invalid_email(cc_email_set) if cc_email_set else None
+    if invalid_email is not None:
+        return {"error": _CC_EMAIL_ERROR.format(invalid_email)}
+
+    if assignee_email:
+        assignee_email = _strip(assignee_email)
+    if assignee_email and not _EMAIL_RE.fullmatch(assignee_email):
+        return _ERR_ASSIGNEE_EMAIL
 
     # Prepare the request payload matching the documentation format
     payload = {
-        "subject": subject.strip(),
-        "requesterEmail": requester_email.strip(),
+        "subject": subject,
+        "requesterEmail": requester_email,
         "impactName": impact_name,
         "priorityName": priority_name,
         "urgencyName": urgency_name,
@@ -334,171 +927,106 @@ def create_request(
         "spam": spam,
     }
 
-    # Add optional fields following documentation format
-    if category_name and category_name != "Request":
-        payload["categoryName"] = category_name
-
-    # Use lowercase for support level as shown in documentation
-    if support_level:
-        payload["supportLevel"] = support_level.lower()
-
-    # Add source only if it's not the default
-    if source and source != "External":
-        payload["source"] = source
-
-    # Add optional fields if provided
-    if cc_email_set:
-        # Validate CC emails
-        for email in cc_email_set:
-            if "@" not in email or "." not in email:
-                return {"error": f"Invalid CC email format: {email}"}
-        payload["ccEmailSet"] = cc_email_set
-
-    if tags:
-        payload["tags"] = tags
-
-    if department_name:
-        payload["departmentName"] = department_name.strip()
-
-    if location_name:
-        payload["locationName"] = location_name.strip()
-
-    if assignee_email:
-        if "@" not in assignee_email or "." not in assignee_email:
-            return {"error": "Invalid assignee email format."}
-        payload["assigneeEmail"] = assignee_email.strip()
-
-    if technician_group_name:
-        payload["technicianGroupName"] = technician_group_name.strip()
-
-    if description:
-        payload["description"] = description.strip()
-
-    if custom_field:
-        payload["customField"] = custom_field
-
-    if link_asset_ids:
-        payload["linkAssetIds"] = link_asset_ids
-
-    if link_ci_ids:
-        payload["linkCiIds"] = link_ci_ids
-
-    if file_attachments:
-        payload["fileAttachments"] = file_attachments
-
-    # Prepare headers with correct Bearer token format
-    headers = {
-        "Authorization": f"Bearer {REQUEST_ACCESS_TOKEN}",
-        "Content-Type": "application/json",
-    }
+    # Attachments whose realName is a file in REQUEST_UPLOAD_DIR are uploaded as
+    # multipart parts; the rest are passed through in the JSON body as references
+    local_attachments = []
+    remote_attachments = []
+    for attachment in file_attachments or ():
+        path = _upload_path(attachment.get("realName", ""))
+        if path:
+            local_attachments.append(path)
+        else:
+            remote_attachments.append(attachment)
+
+    # Optional fields as (API key, value, transform); only truthy values are sent.
+    # Category and source are left out when they are the defaults, and support
+    # level is sent lowercase as shown in the documentation.
+    optional_fields = (
+        ("categoryName", category_name if category_name != "Request" else None, None),
+        ("supportLevel", support_level_lower, None),
+        ("source", source if source != "External" else None, None),
+        ("ccEmailSet", cc_email_set, None),
+        ("tags", tags, None),
+        ("departmentName", department_name, _strip),
+        ("locationName", location_name, _strip),
+        ("assigneeEmail", assignee_email, None),
+        ("technicianGroupName", technician_group_name, _strip),
+        ("description", description, _strip),
+        ("customField", custom_field, None),
+        ("linkAssetIds", link_asset_ids, None),
+        ("linkCiIds", link_ci_ids, None),
+        ("fileAttachments", remote_attachments, None),
+    )
+    payload.update(
+        {key: transform(value) if transform else value for key, value, transform in optional_fields if value}
+    )
 
     # Make the API request
     try:
-        url = f"{REQUEST_SERVER_URL.rstrip('/')}/api/v1/request"
-
-        response = requests.post(url=url, headers=headers, json=payload, timeout=30)
-
-        # Handle different response status codes
-        if response.status_code == 200 or response.status_code == 201:
-            try:
-                response_data = response.json()
-                return {
-                    "success": True,
-                    "message": "Request created successfully",
-                    "request_data": response_data,
-                }
-            except json.JSONDecodeError:
-                return {
-                    "success": True,
-                    "message": "Request created successfully",
-                    "raw_response": response.text,
-                }
-
-        elif response.status_code == 400:
-            try:
-                error_data = response.json()
-                return {
-                    "error": f"Bad Request: {error_data.get('message', 'Invalid request data')}",
-                    "details": error_data,
-                }
-            except json.JSONDecodeError:
-                return {"error": f"Bad Request: {response.text}"}
-
-        elif response.status_code == 401:
-            return {
-                "error": "Unauthorized: Invalid or expired access token. Please check REQUEST_ACCESS_TOKEN."
-            }
-
-        elif response.status_code == 403:
-            return {"error": "Forbidden: You don't have permission to create requests."}
-
-        elif response.status_code == 404:
-            return {
-                "error": "Not Found: The API endpoint was not found. Please check REQUEST_SERVER_URL."
-            }
-
-        elif response.status_code == 500:
-            return {
-                "error": "Internal Server Error: The server encountered an error while processing the request."
-            }
-
+        if local_attachments:
+            response = await _post_with_attachments(payload, local_attachments)
+        elif REQUEST_BATCH_ENABLED:
+            # Coalesced with concurrent calls into one bulk POST
+            return await request_batcher.submit(payload)
         else:
-            try:
-                error_data = response.json()
-                return {
-                    "error": f"API request failed with status {response.status_code}",
-                    "details": error_data,
-                }
-            except json.JSONDecodeError:
-                return {
-                    "error": f"API request failed with status {response.status_code}: {response.text}"
-                }
+            response = await request_http_client.post(
+                _REQUEST_URL, content=orjson.dumps(payload), headers=_JSON_HEADERS
+            )
 
-    except requests.exceptions.Timeout:
-        return {
-            "error": "Request timeout: The API request took too long to complete. Please try again."
-        }
+        return _parse_request_response(response)
 
-    except requests.exceptions.ConnectionError:
-        return {
-            "error": f"Connection error: Could not connect to {REQUEST_SERVER_URL}. Please check the server URL."
-        }
+    except httpx.TimeoutException:
+        return _ERR_TIMEOUT
+
+    except httpx.ConnectError:
+        return _ERR_CONNECT
 
-    except requests.exceptions.RequestException as e:
-        return {"error": f"Request error: {str(e)}"}
+    except httpx.HTTPError as e:
+        return {"error": _REQUEST_ERROR.format(e)}
 
     except Exception as e:
-        return {"error": f"Unexpected error while creating request: {str(e)}"}
+        return {"error": _UNEXPECTED_REQUEST_ERROR.format(e)}
 
 
 async def main(): # <--- 1. Make main async
     """Main server startup function."""
-    print("🔍 Starting Tavily Web Search MCP Server (Official SDK)...")
-    print(f"📡 Server name: {mcp.name}")
-    print("🔧 Available tools: web_search, kb_search, create_request")
-    if TAVILY_API_KEY:
-        print("✅ Tavily API key configured")
-    else:
-        print("❌ Warning: Tavily API key not found")
-
-    if OPENAI_API_KEY:
-        print("✅ OpenAI API key configured")
-    else:
-        print("❌ Warning: OpenAI API key not found")
-
-    if pinecone_index:
-        print("✅ Pinecone knowledge base connected")
-    else:
-        print("❌ Warning: Pinecone knowledge base not available")
-
-    if REQUEST_SERVER_URL and REQUEST_ACCESS_TOKEN:
-        print("✅ Request API configured")
-    else:
-        print("❌ Warning: Request API not configured")
-
-    print(await mcp._list_tools())
-    # Run the server (asynchronous)
-    await mcp.run_streamable_http_async(host='0.0.0.0', port=8000) # <--- 2. Add await
+    # Write the whole startup banner at once
+    banner = "\n".join(
+        [
+            "🔍 Starting Tavily Web Search MCP Server (Official SDK)...",
+            f"📡 Server name: {mcp.name}",
+            "🔧 Available tools: web_search, kb_search, create_request",
+            "✅ Tavily API key configured"
+            if TAVILY_API_KEY
+            else "❌ Warning: Tavily API key not found",
+            "✅ OpenAI API key configured"
+            if OPENAI_API_KEY
+            else "❌ Warning: OpenAI API key not found",
+            f"✅ Pinecone knowledge base configured: {PINECONE_INDEX_NAME} (connects on first search)"
+            if PINECONE_API_KEY and PINECONE_INDEX_NAME
+            else "❌ Warning: Pinecone knowledge base not available",
+            "✅ Request API configured"
+            if REQUEST_SERVER_URL and REQUEST_ACCESS_TOKEN
+            else "❌ Warning: Request API not configured",
+            str(await mcp._list_tools()),
+        ]
+    )
+    sys.stdout.write(banner + "\n")
+    sys.stdout.flush()
+    try:
+        # Run the server (asynchronous)
+        await mcp.run_streamable_http_async(host='0.0.0.0', port=8000) # <--- 2. Add await
+    finally:
+        await request_http_client.aclose()
+        # Only close clients that were actually created
+        openai_client = _openai() if _openai.cache_info().currsize else None
+        if openai_client:
+            await openai_client.close()
+        if _get_pinecone_index.cache_info().currsize:
+            # Closes the gRPC channel (or REST connection pool) if one was opened
+            pinecone_index = _get_pinecone_index()
+            if hasattr(pinecone_index, "close"):
+                pinecone_index.close()
 
 
 if __name__ == "__main__":
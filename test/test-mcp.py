@@ -7,33 +7,240 @@ This script tests the underlying functions without going through FastMCP decorat
 
 import os
 import sys
+import asyncio
 import json
-import requests
+import atexit
+import logging
+import threading
+import functools
+import httpx
+import orjson
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
+from openai import OpenAI
+
+try:
+    # Optional: aiohttp-backed transport scales better than httpx's own async pool
+    from httpx_aiohttp import AiohttpTransport
+except ImportError:
+    AiohttpTransport = None
 
 # Add the src directory to path
 src_path = os.path.join(os.path.dirname(__file__), '..', 'src')
 sys.path.append(src_path)
+# kb/ holds the SQLite embedding cache shared with the ingestion script
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'kb'))
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
+# Stdlib encoder built once, for payloads orjson cannot encode (e.g. non-str keys, big ints)
+_json_pretty = json.JSONEncoder(indent=2, ensure_ascii=False).encode
+
+
+def _pretty(payload) -> str:
+    """Pretty-print a payload for debug logging"""
+    try:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2).decode()
+    except orjson.JSONEncodeError:
+        return _json_pretty(payload)
+
 # Import the clients and configurations directly from main
 try:
     from main import (
-        tavily_client, openai_client, pinecone_index,
-        REQUEST_SERVER_URL, REQUEST_ACCESS_TOKEN, EMBEDDING_MODEL, PINECONE_INDEX_NAME
+        _tavily, _get_pinecone_index, OPENAI_API_KEY, PINECONE_API_KEY,
+        REQUEST_SERVER_URL, REQUEST_ACCESS_TOKEN, EMBEDDING_MODEL, PINECONE_INDEX_NAME,
+        SemanticCache
     )
+    from embedding_cache import EmbeddingCache
     print("✅ Successfully imported MCP server components")
 except ImportError as e:
     print(f"❌ Error importing components: {e}")
     sys.exit(1)
 
+# The server creates the Tavily client lazily; create it up front for the direct tests
+tavily_client = _tavily()
+
+# The server uses an async OpenAI client; these direct tests call the API synchronously
+openai_client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+
+# The server connects to Pinecone lazily; connect up front for the direct tests
+pinecone_index = None
+if PINECONE_API_KEY and PINECONE_INDEX_NAME:
+    try:
+        pinecone_index = _get_pinecone_index()
+    except Exception as e:
+        print(f"❌ Could not connect to Pinecone: {e}")
+
+# Request API URL and headers never change during a run
+_REQUEST_URL = None
+_REQUEST_HEADERS = None
+if REQUEST_SERVER_URL and REQUEST_ACCESS_TOKEN:
+    _REQUEST_URL = f"{REQUEST_SERVER_URL.rstrip('/')}/api/v1/request"
+    _REQUEST_HEADERS = {
+        "Authorization": f"Bearer {REQUEST_ACCESS_TOKEN}",
+        "Content-Type": "application/json"
+    }
+
+# Which services are usable in this run, computed once from the clients above
+_CAPS = frozenset(
+    name for name, available in (
+        ("tavily", tavily_client is not None),
+        ("openai", openai_client is not None),
+        ("pinecone", pinecone_index is not None),
+        ("kb", openai_client is not None and pinecone_index is not None),
+        ("request_api", _REQUEST_URL is not None),
+    ) if available
+)
+
+# Pooled HTTP/2 client for the Request API: connections are reused across test calls
+_http = httpx.Client(
+    http2=True,
+    timeout=30.0,
+    limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+    headers=_REQUEST_HEADERS
+)
+atexit.register(_http.close)
+
+
+def _async_http_client():
+    """Async Request API client, on the aiohttp transport when httpx-aiohttp is installed"""
+    if AiohttpTransport is not None:
+        return httpx.AsyncClient(transport=AiohttpTransport(), timeout=30.0, headers=_REQUEST_HEADERS)
+    return httpx.AsyncClient(http2=True, timeout=30.0, headers=_REQUEST_HEADERS)
+
+
+# Query embeddings keyed on (model, query) so a model change never returns stale vectors
+EMBEDDING_CACHE_SIZE = 512
+_embedding_cache = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+
+# Embeddings also persist on disk across runs, keyed by (model, query hash), in
+# the same SQLite cache the ingestion script uses; opened on the first lookup
+EMBEDDING_DISK_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".embedding_cache.db")
+_disk_cache_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _disk_cache() -> EmbeddingCache:
+    """Open the on-disk embedding cache on first use"""
+    cache = EmbeddingCache(EMBEDDING_DISK_CACHE_PATH)
+    atexit.register(cache.close)
+    return cache
+
+# Recent Pinecone matches keyed by query embedding: a query within cosine
+# similarity 0.95 of a recent one with the same top_k reuses its matches
+MATCH_CACHE_SIZE = 256
+_match_cache = SemanticCache(max_entries=MATCH_CACHE_SIZE)
+_match_cache_lock = threading.Lock()
+
+# Maximum inputs per embeddings request, to stay under tokens-per-minute limits
+EMBEDDING_BATCH_SIZE = 96
+
+
+def _cache_embedding(query: str, embedding: tuple):
+    """Store a query embedding, evicting the least recently used entry when full"""
+    with _embedding_cache_lock:
+        key = (EMBEDDING_MODEL, query)
+        _embedding_cache[key] = embedding
+        _embedding_cache.move_to_end(key)
+        if len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+            _embedding_cache.popitem(last=False)
+
+
+def _store_embeddings(items: List[tuple]):
+    """Persist (query, embedding) pairs to the disk cache"""
+    with _disk_cache_lock:
+        _disk_cache().put_many(
+            EMBEDDING_MODEL,
+            [(EmbeddingCache.content_hash(query.encode()), embedding) for query, embedding in items]
+        )
+
+
+def _cached_embedding(query: str) -> Optional[tuple]:
+    """Return a cached embedding from memory or disk, or None on a miss"""
+    key = (EMBEDDING_MODEL, query)
+    with _embedding_cache_lock:
+        embedding = _embedding_cache.get(key)
+        if embedding is not None:
+            _embedding_cache.move_to_end(key)
+            return embedding
+
+    query_hash = EmbeddingCache.content_hash(query.encode())
+    with _disk_cache_lock:
+        vector = _disk_cache().get_many(EMBEDDING_MODEL, [query_hash]).get(query_hash)
+    if vector is None:
+        return None
+    embedding = tuple(vector)
+    _cache_embedding(query, embedding)
+    return embedding
+
+
+def _embed_one(query: str) -> tuple:
+    """Embed a query, reusing cached vectors from memory (LRU) or disk"""
+    embedding = _cached_embedding(query)
+    if embedding is not None:
+        return embedding
+
+    embedding_response = openai_client.embeddings.create(
+        input=[query],
+        model=EMBEDDING_MODEL
+    )
+    embedding = tuple(embedding_response.data[0].embedding)
+    _cache_embedding(query, embedding)
+    _store_embeddings([(query, embedding)])
+    return embedding
+
+
+def embed_many(queries: List[str]) -> List[List[float]]:
+    """Embed several queries, requesting only uncached ones, at most 96 inputs per request"""
+    embeddings = {query: _cached_embedding(query) for query in queries}
+    missing = [query for query, embedding in embeddings.items() if embedding is None]
+    
+    for start in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+        chunk = missing[start:start + EMBEDDING_BATCH_SIZE]
+        embedding_response = openai_client.embeddings.create(
+            input=chunk,
+            model=EMBEDDING_MODEL
+        )
+        new_embeddings = [
+            (query, tuple(data.embedding))
+            for query, data in zip(chunk, sorted(embedding_response.data, key=lambda d: d.index))
+        ]
+        for query, embedding in new_embeddings:
+            _cache_embedding(query, embedding)
+            embeddings[query] = embedding
+        _store_embeddings(new_embeddings)
+    
+    return [list(embeddings[query]) for query in queries]
+
+
+def _query_pinecone(query_embedding: List[float], top_k: int):
+    """Query Pinecone with an embedding and format the matches"""
+    search_response = pinecone_index.query(
+        vector=query_embedding,
+        top_k=top_k,
+        include_metadata=True
+    )
+    
+    return [
+        {
+            "id": match.id,
+            "score": float(match.score),
+            "text": match.metadata.get("text", "") if match.metadata else "",
+            "source": match.metadata.get("source", "") if match.metadata else ""
+        }
+        for match in search_response.matches
+    ]
+
+
 def test_web_search_direct(query: str, max_results: int = 5):
     """Test web search directly using the tavily client"""
     print(f"\n🔍 Testing Web Search: '{query}'")
     
-    if not tavily_client:
+    if "tavily" not in _CAPS:
         return {"error": "Tavily client not initialized"}
     
     try:
@@ -44,23 +251,20 @@ def test_web_search_direct(query: str, max_results: int = 5):
             include_answer=True
         )
         
-        formatted_response = {
+        return {
             "query": query,
             "answer": response.get("answer", ""),
-            "results": []
+            "results": [
+                {
+                    "title": result.get("title", ""),
+                    "url": result.get("url", ""),
+                    "content": result.get("content", ""),
+                    "score": result.get("score", 0)
+                }
+                for result in response.get("results", ())
+            ]
         }
         
-        for result in response.get("results", []):
-            formatted_result = {
-                "title": result.get("title", ""),
-                "url": result.get("url", ""),
-                "content": result.get("content", ""),
-                "score": result.get("score", 0)
-            }
-            formatted_response["results"].append(formatted_result)
-        
-        return formatted_response
-        
     except Exception as e:
         return {"error": f"Search error: {str(e)}"}
 
@@ -69,60 +273,62 @@ def test_kb_search_direct(query: str, top_k: int = 3):
     """Test KB search directly using openai and pinecone clients"""
     print(f"\n🧠 Testing KB Search: '{query}'")
     
-    if not pinecone_index:
+    if "pinecone" not in _CAPS:
         return {"error": "Pinecone index not initialized"}
     
-    if not openai_client:
+    if "openai" not in _CAPS:
         return {"error": "OpenAI client not initialized"}
     
     try:
-        # Generate embedding
-        embedding_response = openai_client.embeddings.create(
-            input=[query],
-            model=EMBEDDING_MODEL
-        )
-        query_embedding = embedding_response.data[0].embedding
+        # Generate embedding (cached for repeated queries)
+        query_embedding = list(_embed_one(query))
         
-        # Search Pinecone
-        search_response = pinecone_index.query(
-            vector=query_embedding,
-            top_k=top_k,
-            include_metadata=True
-        )
+        # Search Pinecone, unless a near-identical query was searched recently
+        with _match_cache_lock:
+            results = _match_cache.get(query_embedding, top_k)
+        if results is None:
+            results = _query_pinecone(query_embedding, top_k)
+            with _match_cache_lock:
+                _match_cache.put(query_embedding, top_k, results)
         
-        formatted_response = {
+        return {
             "query": query,
-            "results": []
+            "results": results
         }
         
-        for match in search_response.matches:
-            result = {
-                "id": match.id,
-                "score": float(match.score),
-                "text": match.metadata.get("text", "") if match.metadata else "",
-                "source": match.metadata.get("source", "") if match.metadata else ""
-            }
-            formatted_response["results"].append(result)
-        
-        return formatted_response
-        
     except Exception as e:
         return {"error": f"KB search error: {str(e)}"}
 
 
-def test_create_request_direct(subject: str, requester_email: str, **kwargs):
-    """Test request creation directly using requests with correct Bearer token and payload format"""
+# Optional create-request kwargs passed through unchanged, as (kwarg, API field)
+_OPTIONAL_FIELD_MAP = (
+    ("description", "description"),
+    ("tags", "tags"),
+    ("department_name", "departmentName"),
+    ("location_name", "locationName"),
+    ("assignee_email", "assigneeEmail"),
+    ("technician_group_name", "technicianGroupName"),
+    ("cc_email_set", "ccEmailSet"),
+    ("custom_field", "customField"),
+    ("link_asset_ids", "linkAssetIds"),
+    ("link_ci_ids", "linkCiIds"),
+    ("file_attachments", "fileAttachments"),
+)
+
+
+def _prepare_create_request(subject: str, requester_email: str, **kwargs):
+    """Validate a create-request test case and build its payload; returns (payload, error)"""
     print(f"\n🎫 Testing Create Request: '{subject}'")
     
-    if not REQUEST_SERVER_URL or not REQUEST_ACCESS_TOKEN:
-        return {"error": "Request API not configured"}
+    if "request_api" not in _CAPS:
+        return None, {"error": "Request API not configured"}
     
     # Basic validation
     if not subject or not subject.strip():
-        return {"error": "Subject is required"}
+        return None, {"error": "Subject is required"}
     
     if not requester_email or "@" not in requester_email:
-        return {"error": "Valid requester email is required"}
+        return None, {"error": "Valid requester email is required"}
     
     # Build payload matching the exact format from documentation
     payload = {
@@ -144,151 +350,262 @@ def test_create_request_direct(subject: str, requester_email: str, **kwargs):
         payload["supportLevel"] = kwargs["support_level"].lower()
     
     # Add optional fields exactly as shown in documentation
-    if kwargs.get("description"):
-        payload["description"] = kwargs["description"]
-    if kwargs.get("tags"):
-        payload["tags"] = kwargs["tags"]
-    if kwargs.get("department_name"):
-        payload["departmentName"] = kwargs["department_name"]
-    if kwargs.get("location_name"):
-        payload["locationName"] = kwargs["location_name"]
-    if kwargs.get("assignee_email"):
-        payload["assigneeEmail"] = kwargs["assignee_email"]
-    if kwargs.get("technician_group_name"):
-        payload["technicianGroupName"] = kwargs["technician_group_name"]
-    if kwargs.get("cc_email_set"):
-        payload["ccEmailSet"] = kwargs["cc_email_set"]
-    if kwargs.get("custom_field"):
-        payload["customField"] = kwargs["custom_field"]
-    if kwargs.get("link_asset_ids"):
-        payload["linkAssetIds"] = kwargs["link_asset_ids"]
-    if kwargs.get("link_ci_ids"):
-        payload["linkCiIds"] = kwargs["link_ci_ids"]
-    if kwargs.get("file_attachments"):
-        payload["fileAttachments"] = kwargs["file_attachments"]
-    
-    # Use Bearer token with correct format
-    headers = {
-        "Authorization": f"Bearer {REQUEST_ACCESS_TOKEN}",
-        "Content-Type": "application/json"
-    }
+    payload.update(
+        {api_key: kwargs[py_key] for py_key, api_key in _OPTIONAL_FIELD_MAP if kwargs.get(py_key)}
+    )
+    
+    print(f"Making request to: {_REQUEST_URL}")
+    print(f"Headers: Authorization: Bearer {REQUEST_ACCESS_TOKEN[:20]}...")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Payload: %s", _pretty(payload))
+    
+    return payload, None
+
+
+def _create_request_result(response: httpx.Response):
+    """Format the Request API response to a create-request test case"""
+    print(f"Response status code: {response.status_code}")
+    print(f"Response headers: {dict(response.headers)}")
     
+    # Decode the body once; both branches reuse it for parsing and raw output
+    body = response.text
     try:
-        url = f"{REQUEST_SERVER_URL.rstrip('/')}/api/v1/request"
-        print(f"Making request to: {url}")
-        print(f"Headers: Authorization: Bearer {REQUEST_ACCESS_TOKEN[:20]}...")
-        print(f"Payload: {json.dumps(payload, indent=2)}")
-        
-        response = requests.post(url=url, headers=headers, json=payload, timeout=30)
-        
-        print(f"Response status code: {response.status_code}")
-        print(f"Response headers: {dict(response.headers)}")
-        
-        if response.status_code in [200, 201]:
-            try:
-                response_data = response.json()
-                return {
-                    "success": True,
-                    "message": "Request created successfully",
-                    "request_data": response_data
-                }
-            except json.JSONDecodeError:
-                return {
-                    "success": True,
-                    "message": "Request created successfully",
-                    "raw_response": response.text
-                }
-        else:
-            try:
-                error_data = response.json()
-                return {
-                    "error": f"API error ({response.status_code}): {error_data.get('message', error_data.get('userMessage', 'Unknown error'))}",
-                    "details": error_data,
-                    "raw_response": response.text
-                }
-            except json.JSONDecodeError:
-                return {
-                    "error": f"API error ({response.status_code}): {response.text}"
-                }
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        data = None
+    
+    if response.status_code in [200, 201]:
+        if data is None:
+            return {
+                "success": True,
+                "message": "Request created successfully",
+                "raw_response": body
+            }
+        return {
+            "success": True,
+            "message": "Request created successfully",
+            "request_data": data
+        }
+    if data is None:
+        return {
+            "error": f"API error ({response.status_code}): {body}"
+        }
+    return {
+        "error": f"API error ({response.status_code}): {data.get('message', data.get('userMessage', 'Unknown error'))}",
+        "details": data,
+        "raw_response": body
+    }
+
+def test_create_request_direct(subject: str, requester_email: str, **kwargs):
+    """Test request creation directly over the pooled httpx client with correct Bearer token and payload format"""
+    payload, error = _prepare_create_request(subject, requester_email, **kwargs)
+    if error:
+        return error
     
-    except requests.exceptions.RequestException as e:
+    try:
+        response = _http.post(_REQUEST_URL, content=orjson.dumps(payload))
+        return _create_request_result(response)
+    except httpx.HTTPError as e:
         return {"error": f"Request error: {str(e)}"}
     except Exception as e:
         return {"error": f"Unexpected error: {str(e)}"}
 
 
-def test_minimal_request():
-    """Test with minimal required fields only"""
+async def _create_request_async(client: httpx.AsyncClient, payload: Dict[str, Any]):
+    """POST a prepared create-request payload over a shared async client"""
+    try:
+        response = await client.post(_REQUEST_URL, content=orjson.dumps(payload))
+        return _create_request_result(response)
+    except httpx.HTTPError as e:
+        return {"error": f"Request error: {str(e)}"}
+    except Exception as e:
+        return {"error": f"Unexpected error: {str(e)}"}
+
+
+# Maximum create-request test cases in flight against the Request API
+CREATE_REQUEST_CONCURRENCY = 5
+
+
+async def run_create_request_scenarios(scenarios: List[Dict[str, Any]]):
+    """Run create-request test cases (test_create_request_direct kwargs) concurrently
+    
+    All cases share one async client, and a semaphore keeps at most
+    CREATE_REQUEST_CONCURRENCY requests in flight. Results are returned in
+    scenario order.
+    """
+    semaphore = asyncio.Semaphore(CREATE_REQUEST_CONCURRENCY)
+    
+    async with _async_http_client() as client:
+        async def run_scenario(scenario):
+            payload, error = _prepare_create_request(**scenario)
+            if error:
+                return error
+            async with semaphore:
+                return await _create_request_async(client, payload)
+        
+        return await asyncio.gather(*(run_scenario(scenario) for scenario in scenarios))
+
+
+# Minimal payload matching documentation exactly
+MINIMAL_REQUEST_PAYLOAD = {
+    "subject": "Minimal test request",
+    "requesterEmail": "test@example.com"
+}
+_MINIMAL_REQUEST_BODY = orjson.dumps(MINIMAL_REQUEST_PAYLOAD)
+
+
+def _start_minimal_request():
+    """Print the minimal request header; returns an error if the Request API is not configured"""
     print("\n🔬 Testing Minimal Request (Only Required Fields)")
     
-    if not REQUEST_SERVER_URL or not REQUEST_ACCESS_TOKEN:
+    if "request_api" not in _CAPS:
         return {"error": "Request API not configured"}
     
-    # Minimal payload matching documentation exactly
-    payload = {
-        "subject": "Minimal test request",
-        "requesterEmail": "test@example.com"
-    }
+    print(f"Making minimal request to: {_REQUEST_URL}")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Minimal Payload: %s", _pretty(MINIMAL_REQUEST_PAYLOAD))
+    return None
+
+
+def _minimal_request_result(response: httpx.Response):
+    """Format the Request API response to the minimal request"""
+    print(f"Response status code: {response.status_code}")
     
-    headers = {
-        "Authorization": f"Bearer {REQUEST_ACCESS_TOKEN}",
-        "Content-Type": "application/json"
+    body = response.text
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        data = None
+    
+    if response.status_code in [200, 201]:
+        if data is None:
+            return {
+                "success": True,
+                "message": "Minimal request created successfully",
+                "raw_response": body
+            }
+        print("✅ Minimal Request Success!")
+        return {
+            "success": True,
+            "message": "Minimal request created successfully",
+            "request_data": data
+        }
+    if data is None:
+        return {
+            "error": f"API error ({response.status_code}): {body}"
+        }
+    print(f"❌ Minimal Request Failed: {data}")
+    return {
+        "error": f"API error ({response.status_code}): {data.get('message', data.get('userMessage', 'Unknown error'))}",
+        "details": data
     }
+
+def test_minimal_request():
+    """Test with minimal required fields only"""
+    error = _start_minimal_request()
+    if error:
+        return error
     
     try:
-        url = f"{REQUEST_SERVER_URL.rstrip('/')}/api/v1/request"
-        print(f"Making minimal request to: {url}")
-        print(f"Minimal Payload: {json.dumps(payload, indent=2)}")
-        
-        response = requests.post(url=url, headers=headers, json=payload, timeout=30)
-        print(f"Response status code: {response.status_code}")
-        
-        if response.status_code in [200, 201]:
-            try:
-                response_data = response.json()
-                print("✅ Minimal Request Success!")
-                return {
-                    "success": True,
-                    "message": "Minimal request created successfully",
-                    "request_data": response_data
-                }
-            except json.JSONDecodeError:
-                return {
-                    "success": True,
-                    "message": "Minimal request created successfully",
-                    "raw_response": response.text
-                }
-        else:
-            try:
-                error_data = response.json()
-                print(f"❌ Minimal Request Failed: {error_data}")
-                return {
-                    "error": f"API error ({response.status_code}): {error_data.get('message', error_data.get('userMessage', 'Unknown error'))}",
-                    "details": error_data
-                }
-            except json.JSONDecodeError:
-                return {
-                    "error": f"API error ({response.status_code}): {response.text}"
-                }
+        return _minimal_request_result(_http.post(_REQUEST_URL, content=_MINIMAL_REQUEST_BODY))
+    except Exception as e:
+        return {"error": f"Unexpected error: {str(e)}"}
+
+
+async def test_minimal_request_async():
+    """Async variant of test_minimal_request over an httpx.AsyncClient"""
+    error = _start_minimal_request()
+    if error:
+        return error
     
+    try:
+        async with _async_http_client() as client:
+            response = await client.post(_REQUEST_URL, content=_MINIMAL_REQUEST_BODY)
+        return _minimal_request_result(response)
     except Exception as e:
         return {"error": f"Unexpected error: {str(e)}"}
 
 
+async def test_web_search_async(query: str, max_results: int = 5):
+    """Async variant of test_web_search_direct (the Tavily SDK runs in a worker thread)"""
+    return await asyncio.to_thread(test_web_search_direct, query, max_results)
+
+
+async def test_kb_search_async(query: str, top_k: int = 3):
+    """Async variant of test_kb_search_direct (the OpenAI and Pinecone SDKs run in a worker thread)"""
+    return await asyncio.to_thread(test_kb_search_direct, query, top_k)
+
+
+async def _run_probes():
+    """Run the web search, KB search and minimal request probes concurrently
+    
+    The probes hit different services, so total latency is the slowest probe
+    rather than the sum. Probes whose clients are not configured return None.
+    """
+    async def skipped():
+        return None
+    
+    async def kb_probes():
+        # Embed every KB test query in one request; each search then hits the cache
+        try:
+            await asyncio.to_thread(embed_many, [query for query, _ in KB_TEST_QUERIES])
+        except Exception as e:
+            print(f"❌ KB Search: batch embedding failed, embedding per query: {e}")
+        return await asyncio.gather(
+            *(test_kb_search_async(query, top_k) for query, top_k in KB_TEST_QUERIES)
+        )
+    
+    return await asyncio.gather(
+        test_web_search_async("Python FastMCP tutorial", 2) if "tavily" in _CAPS else skipped(),
+        kb_probes() if "kb" in _CAPS else skipped(),
+        test_minimal_request_async() if "request_api" in _CAPS else skipped(),
+    )
+
+
+# Full create-request test cases as test_create_request_direct kwargs
+CREATE_REQUEST_SCENARIOS = [
+    {
+        "subject": "Complete test request - All fields",
+        "requester_email": "test@example.com",
+        "priority_name": "Medium",
+        "urgency_name": "Medium",
+        "impact_name": "Low",
+        "status_name": "Open",
+        "category_name": "Network",
+        "support_level": "tier2",  # Use lowercase as per documentation
+        "department_name": "IT",
+        "assignee_email": "admin@example.com",
+        "technician_group_name": "IT Support",
+        "cc_email_set": ["manager@example.com"],
+        "tags": ["test", "mcp", "fixed-auth", "complete"],
+        "spam": False,
+    },
+]
+
+# Environment variables reported by run_all_tests
+REQUIRED_ENV_VARS = (
+    "TAVILY_API_KEY",
+    "OPENAI_API_KEY",
+    "PINECONE_API_KEY",
+    "PINECONE_INDEX_NAME",
+    "REQUEST_SERVER_URL",
+    "REQUEST_ACCESS_TOKEN",
+)
+
+# KB search probes as (query, top_k)
+KB_TEST_QUERIES = [
+    ("API integration", 3),
+]
+
+
 def run_all_tests():
     """Run comprehensive tests of all tools"""
     print("🧪 SOPS-AI MCP SERVER DIRECT TESTING")
     print("=" * 60)
     
     # Check environment
-    env_vars = {
-        "TAVILY_API_KEY": os.getenv("TAVILY_API_KEY"),
-        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY"),
-        "PINECONE_API_KEY": os.getenv("PINECONE_API_KEY"),
-        "PINECONE_INDEX_NAME": os.getenv("PINECONE_INDEX_NAME"),
-        "REQUEST_SERVER_URL": os.getenv("REQUEST_SERVER_URL"),
-        "REQUEST_ACCESS_TOKEN": os.getenv("REQUEST_ACCESS_TOKEN")
-    }
+    environ = os.environ
+    env_vars = {var: environ.get(var) for var in REQUIRED_ENV_VARS}
     
     print("Environment Check:")
     for var, value in env_vars.items():
@@ -297,9 +614,11 @@ def run_all_tests():
     
     print("\n" + "=" * 60)
     
+    web_result, kb_results, minimal_result = asyncio.run(_run_probes())
+    
     # Test Web Search
-    if tavily_client:
-        result = test_web_search_direct("Python FastMCP tutorial", 2)
+    if web_result is not None:
+        result = web_result
         if "error" in result:
             print(f"❌ Web Search Error: {result['error']}")
         else:
@@ -312,25 +631,24 @@ def run_all_tests():
         print("❌ Web Search: Tavily client not available")
     
     # Test KB Search  
-    if openai_client and pinecone_index:
-        result = test_kb_search_direct("API integration", 3)
-        if "error" in result:
-            print(f"❌ KB Search Error: {result['error']}")
-        else:
-            print(f"✅ KB Search Success: Found {len(result['results'])} results")
-            for i, res in enumerate(result['results'][:2], 1):
-                print(f"   {i}. Score: {res['score']:.3f} - {res['text'][:50]}...")
+    if kb_results is not None:
+        for result in kb_results:
+            if "error" in result:
+                print(f"❌ KB Search Error: {result['error']}")
+            else:
+                print(f"✅ KB Search Success: Found {len(result['results'])} results")
+                for i, res in enumerate(result['results'][:2], 1):
+                    print(f"   {i}. Score: {res['score']:.3f} - {res['text'][:50]}...")
     else:
         print("❌ KB Search: OpenAI or Pinecone client not available")
     
     # Test Create Request - First try minimal request
-    if REQUEST_SERVER_URL and REQUEST_ACCESS_TOKEN:
+    if "request_api" in _CAPS:
         print("\n" + "=" * 60)
         print("TESTING CREATE REQUEST FUNCTIONALITY")
         print("=" * 60)
         
-        # Test 1: Minimal request
-        minimal_result = test_minimal_request()
+        # Test 1: Minimal request (already run alongside the search probes)
         if "error" in minimal_result:
             print(f"❌ Minimal Request Error: {minimal_result['error']}")
             if minimal_result.get('details'):
@@ -342,39 +660,25 @@ def run_all_tests():
                 print(f"   Request ID: {req_data.get('id', 'N/A')}")
                 print(f"   Name: {req_data.get('name', 'N/A')}")
         
-        # Test 2: Full request with all optional fields
+        # Test 2: Full request(s) with all optional fields, run concurrently
         print("\n" + "-" * 40)
-        result = test_create_request_direct(
-            subject="Complete test request - All fields",
-            requester_email="test@example.com",
-            priority_name="Medium",
-            urgency_name="Medium",
-            impact_name="Low",
-            status_name="Open",
-            category_name="Network",
-            support_level="tier2",  # Use lowercase as per documentation
-            department_name="IT",
-            assignee_email="admin@example.com",
-            technician_group_name="IT Support",
-            cc_email_set=["manager@example.com"],
-            tags=["test", "mcp", "fixed-auth", "complete"],
-            spam=False,
-        )
+        results = asyncio.run(run_create_request_scenarios(CREATE_REQUEST_SCENARIOS))
         
-        if "error" in result:
-            print(f"❌ Full Create Request Error: {result['error']}")
-            if result.get('details'):
-                print(f"   Details: {result['details']}")
-            if result.get('raw_response'):
-                print(f"   Raw Response: {result['raw_response'][:200]}...")
-        else:
-            print(f"✅ Full Create Request Success: {result['message']}")
-            if result.get('request_data'):
-                req_data = result['request_data']
-                print(f"   Request ID: {req_data.get('id', 'N/A')}")
-                print(f"   Name: {req_data.get('name', 'N/A')}")
-                print(f"   Created Time: {req_data.get('createdTime', 'N/A')}")
-                print(f"   Support Level: {req_data.get('supportLevel', 'N/A')}")
+        for result in results:
+            if "error" in result:
+                print(f"❌ Full Create Request Error: {result['error']}")
+                if result.get('details'):
+                    print(f"   Details: {result['details']}")
+                if result.get('raw_response'):
+                    print(f"   Raw Response: {result['raw_response'][:200]}...")
+            else:
+                print(f"✅ Full Create Request Success: {result['message']}")
+                if result.get('request_data'):
+                    req_data = result['request_data']
+                    print(f"   Request ID: {req_data.get('id', 'N/A')}")
+                    print(f"   Name: {req_data.get('name', 'N/A')}")
+                    print(f"   Created Time: {req_data.get('createdTime', 'N/A')}")
+                    print(f"   Support Level: {req_data.get('supportLevel', 'N/A')}")
     
     else:
         print("❌ Create Request: API configuration not available")
@@ -388,7 +692,7 @@ def run_all_tests():
     print("- Used lowercase support levels (tier1, tier2, etc.)")
     print("- Added minimal request test to isolate issues")
     print("- Enhanced error reporting with detailed debugging")
-    print("- Added payload visualization for troubleshooting")
+    print("- Added payload visualization for troubleshooting (run with LOG_LEVEL=DEBUG)")
     print("\nIf you're still getting errors, the issue might be:")
     print("1. Invalid access token (expired or wrong scope)")
     print("2. Server-side validation rules not in documentation")
@@ -396,4 +700,7 @@ def run_all_tests():
 
 
 if __name__ == "__main__":
+    # LOG_LEVEL applies to this script only; library loggers (httpcore, asyncio) stay at INFO
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    log.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
     run_all_tests()
\ No newline at end of file